@@ -32,50 +32,151 @@ class HueBridgeDiscovery:
             print(f"❌ N-UPnP discovery failed: {e}")
             return []
 
+    @staticmethod
+    async def probe_bridges(addresses: List[str]) -> List[Dict[str, str]]:
+        """Confirm candidate addresses are Hue bridges and fetch their IDs.
+
+        At most 32 probes run at once and the whole pass is capped at 5s, so a
+        long candidate list or unresponsive hosts can't stall setup.
+        """
+        
+        async def check_ip(
+            client: httpx.AsyncClient, sem: asyncio.Semaphore, ip_str: str
+        ) -> Optional[Dict[str, str]]:
+            try:
+                async with sem:
+                    response = await client.get(f"http://{ip_str}/api/config")
+                data = response.json()
+                
+                # Check if this looks like a Hue bridge
+                if "bridgeid" in data and "name" in data:
+                    return {"internalipaddress": ip_str, "id": data["bridgeid"]}
+            except Exception:
+                pass
+            return None
+        
+        if not addresses:
+            return []
+        
+        # Candidates are LAN IP literals: no proxies, no env lookups, no DNS
+        sem = asyncio.Semaphore(32)
+        limits = httpx.Limits(max_connections=32)
+        timeout = httpx.Timeout(2.0, connect=0.5)
+        async with httpx.AsyncClient(
+            timeout=timeout, limits=limits, trust_env=False
+        ) as client:
+            tasks = [
+                asyncio.ensure_future(check_ip(client, sem, ip)) for ip in addresses
+            ]
+            
+            # Cap the whole pass so unresponsive hosts can't stall it
+            done, pending = await asyncio.wait(tasks, timeout=5.0)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        return [task.result() for task in done if task.result()]
+
     @staticmethod
     async def discover_via_mdns() -> List[Dict[str, str]]:
         """Discover bridges using mDNS/Bonjour (fallback method)."""
-        bridges = []
         try:
-            # Simple network scan for bridges on common subnets
-            import ipaddress
+            from zeroconf import ServiceStateChange
+            from zeroconf.asyncio import (
+                AsyncServiceBrowser,
+                AsyncServiceInfo,
+                AsyncZeroconf,
+            )
+        except ImportError:
+            print(
+                "❌ mDNS discovery unavailable: install the 'mdns' extra "
+                "(pip install -e \".[mdns]\")"
+            )
+            return []
+        
+        service_type = "_hue._tcp.local."
+        names: List[str] = []
+        
+        def on_service_state_change(zeroconf, service_type, name, state_change):
+            if state_change is ServiceStateChange.Added:
+                names.append(name)
+        
+        try:
+            print(f"🔍 Browsing mDNS for {service_type} services...")
             
-            # Get local IP to determine subnet
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            local_ip = s.getsockname()[0]
-            s.close()
+            aiozc = AsyncZeroconf()
+            try:
+                browser = AsyncServiceBrowser(
+                    aiozc.zeroconf, service_type, handlers=[on_service_state_change]
+                )
+                await asyncio.sleep(1.5)
+                await browser.async_cancel()
+                
+                infos = [AsyncServiceInfo(service_type, name) for name in names]
+                await asyncio.gather(
+                    *(info.async_request(aiozc.zeroconf, 1500) for info in infos)
+                )
+            finally:
+                await aiozc.async_close()
             
-            network = ipaddress.IPv4Network(f"{local_ip}/24", strict=False)
+            addresses = {
+                addr
+                for info in infos
+                for addr in info.parsed_addresses()
+                if ":" not in addr  # IPv4 only, the bridge API is addressed by IPv4
+            }
+            bridges = await HueBridgeDiscovery.probe_bridges(sorted(addresses))
             
-            print(f"🔍 Scanning network {network} for Hue bridges...")
+            print(f"🔍 Found {len(bridges)} bridge(s) via mDNS")
+            return bridges
             
-            async def check_ip(ip_str: str) -> Optional[Dict[str, str]]:
-                try:
-                    async with httpx.AsyncClient(timeout=2.0) as client:
-                        response = await client.get(f"http://{ip_str}/api/config")
-                        data = response.json()
-                        
-                        # Check if this looks like a Hue bridge
-                        if "bridgeid" in data and "name" in data:
-                            return {"internalipaddress": ip_str, "id": data["bridgeid"]}
-                except:
-                    pass
-                return None
+        except Exception as e:
+            print(f"❌ mDNS discovery failed: {e}")
+            return []
+
+    @staticmethod
+    async def discover_via_ssdp() -> List[Dict[str, str]]:
+        """Discover bridges using an SSDP M-SEARCH (last resort)."""
+
+        class SSDPProtocol(asyncio.DatagramProtocol):
+            def __init__(self):
+                self.addresses = set()
+
+            def datagram_received(self, data, addr):
+                # Hue bridges announce themselves with IpBridge / hue-bridgeid headers
+                text = data.decode(errors="ignore").lower()
+                if "ipbridge" in text or "hue-bridgeid" in text:
+                    self.addresses.add(addr[0])
+        
+        message = (
+            b"M-SEARCH * HTTP/1.1\r\n"
+            b"HOST: 239.255.255.250:1900\r\n"
+            b'MAN: "ssdp:discover"\r\n'
+            b"MX: 2\r\n"
+            b"ST: upnp:rootdevice\r\n"
+            b"\r\n"
+        )
+        
+        try:
+            print("🔍 Searching for Hue bridges via SSDP...")
             
-            # Check a subset of IPs to avoid too many requests
-            tasks = []
-            for ip in list(network.hosts())[:50]:  # Check first 50 IPs
-                tasks.append(check_ip(str(ip)))
+            loop = asyncio.get_running_loop()
+            transport, protocol = await loop.create_datagram_endpoint(
+                SSDPProtocol, family=socket.AF_INET, local_addr=("0.0.0.0", 0)
+            )
+            try:
+                transport.sendto(message, ("239.255.255.250", 1900))
+                await asyncio.sleep(2.5)
+            finally:
+                transport.close()
             
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            bridges = [r for r in results if isinstance(r, dict)]
+            bridges = await HueBridgeDiscovery.probe_bridges(sorted(protocol.addresses))
             
-            print(f"🔍 Found {len(bridges)} bridge(s) via network scan")
+            print(f"🔍 Found {len(bridges)} bridge(s) via SSDP")
             return bridges
             
         except Exception as e:
-            print(f"❌ mDNS/network discovery failed: {e}")
+            print(f"❌ SSDP discovery failed: {e}")
             return []
 
     @classmethod
@@ -86,63 +187,123 @@ class HueBridgeDiscovery:
         # Try N-UPnP first (more reliable)
         bridges = await cls.discover_via_nupnp()
         
-        # If no bridges found, try network scan
+        # If no bridges found, try a local mDNS query
         if not bridges:
             bridges = await cls.discover_via_mdns()
         
+        # Fall back to SSDP only if mDNS found nothing either
+        if not bridges:
+            bridges = await cls.discover_via_ssdp()
+        
         return bridges
 
 
 class HueBridgeAuth:
-    """Handles authentication with Hue bridge."""
+    """Handles authentication with Hue bridge.
+
+    Use as an async context manager to share one HTTP client across calls.
+    """
     
     def __init__(self, bridge_ip: str):
         self.bridge_ip = bridge_ip
         self.base_url = f"http://{bridge_ip}/api"
+        self._client: Optional[httpx.AsyncClient] = None
+        self._last_error: Optional[str] = None
+    
+    async def __aenter__(self):
+        self._client = httpx.AsyncClient(timeout=10.0, trust_env=False)
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._client:
+            await self._client.aclose()
+            self._client = None
     
-    async def create_user(self, app_name: str = "hue_mcp_server") -> Optional[str]:
-        """Create a new user on the bridge."""
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request on the shared client, or a one-off client if none is open."""
+        if self._client is not None:
+            return await self._client.request(method, url, **kwargs)
+        async with httpx.AsyncClient(timeout=10.0, trust_env=False) as client:
+            return await client.request(method, url, **kwargs)
+    
+    def _report_error(self, message: str, quiet: bool) -> None:
+        """Print an error, skipping quiet repeats of the last one printed."""
+        if quiet and message == self._last_error:
+            return
+        self._last_error = message
+        print(message)
+    
+    async def create_user(
+        self, app_name: str = "hue_mcp_server", quiet: bool = False
+    ) -> Optional[str]:
+        """Create a new user on the bridge.
+        
+        With quiet=True the "link button not pressed" error isn't reported
+        and any other error is printed only once while it keeps repeating,
+        for callers that poll until the button is pressed.
+        """
         data = {"devicetype": app_name}
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            try:
-                response = await client.post(self.base_url, json=data)
-                response.raise_for_status()
-                result = response.json()
-                
-                if isinstance(result, list) and result:
-                    if "success" in result[0]:
-                        username = result[0]["success"]["username"]
-                        print(f"✅ Successfully created user: {username}")
-                        return username
-                    elif "error" in result[0]:
-                        error = result[0]["error"]
-                        if error.get("type") == 101:
+        try:
+            response = await self._request("POST", self.base_url, json=data)
+            response.raise_for_status()
+            result = response.json()
+            
+            if isinstance(result, list) and result:
+                if "success" in result[0]:
+                    username = result[0]["success"]["username"]
+                    print(f"✅ Successfully created user: {username}")
+                    return username
+                elif "error" in result[0]:
+                    error = result[0]["error"]
+                    if error.get("type") == 101:
+                        if not quiet:
                             print("❌ Link button not pressed. Please press the link button on your Hue bridge.")
-                        else:
-                            print(f"❌ Error creating user: {error.get('description', 'Unknown error')}")
-                        return None
-                
-                print(f"❌ Unexpected response: {result}")
-                return None
-                
-            except Exception as e:
-                print(f"❌ Failed to create user: {e}")
-                return None
+                    else:
+                        self._report_error(
+                            "❌ Error creating user: "
+                            f"{error.get('description', 'Unknown error')}",
+                            quiet,
+                        )
+                    return None
+            
+            self._report_error(f"❌ Unexpected response: {result}", quiet)
+            return None
+            
+        except Exception as e:
+            self._report_error(f"❌ Failed to create user: {e}", quiet)
+            return None
+    
+    async def wait_for_user(
+        self, timeout: float = 30.0, interval: float = 0.5
+    ) -> Optional[str]:
+        """Poll create_user until the link button is pressed or timeout expires."""
+        self._last_error = None
+        
+        async def poll() -> str:
+            while True:
+                username = await self.create_user(quiet=True)
+                if username:
+                    return username
+                await asyncio.sleep(interval)
+        
+        try:
+            return await asyncio.wait_for(poll(), timeout)
+        except asyncio.TimeoutError:
+            return None
     
     async def test_user(self, username: str) -> bool:
         """Test if the username works with the bridge."""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/{username}/config")
-                response.raise_for_status()
-                data = response.json()
+            response = await self._request("GET", f"{self.base_url}/{username}/config")
+            response.raise_for_status()
+            data = response.json()
+            
+            # Check if we got bridge config (not an error)
+            if isinstance(data, dict) and "bridgeid" in data:
+                return True
                 
-                # Check if we got bridge config (not an error)
-                if isinstance(data, dict) and "bridgeid" in data:
-                    return True
-                    
-                return False
+            return False
                 
         except Exception:
             return False
@@ -187,39 +348,29 @@ async def interactive_setup():
                 return False
     
     # Step 3: Authentication
-    auth = HueBridgeAuth(bridge_ip)
-    
     print(f"\n🔗 Connecting to bridge at {bridge_ip}")
     print("🔴 Please press the LINK BUTTON on your Hue bridge now!")
     print("   You have 30 seconds after pressing the button...")
     
     input("Press ENTER when you have pressed the link button: ")
     
-    # Try to create user for up to 30 seconds
-    print("🔄 Attempting to authenticate...")
-    
-    username = None
-    for attempt in range(6):  # 6 attempts over 30 seconds
-        username = await auth.create_user()
-        if username:
-            break
+    async with HueBridgeAuth(bridge_ip) as auth:
+        # Poll for up to 30 seconds so the press is picked up right away
+        print("🔄 Attempting to authenticate...")
+        username = await auth.wait_for_user(timeout=30.0)
         
-        if attempt < 5:
-            print(f"   Retrying in 5 seconds... (attempt {attempt + 1}/6)")
-            await asyncio.sleep(5)
-    
-    if not username:
-        print("❌ Failed to authenticate with the bridge.")
-        print("   Please make sure you pressed the link button and try again.")
-        return False
-    
-    # Step 4: Test authentication
-    print("🧪 Testing authentication...")
-    if await auth.test_user(username):
-        print("✅ Authentication successful!")
-    else:
-        print("❌ Authentication test failed.")
-        return False
+        if not username:
+            print("❌ Failed to authenticate with the bridge.")
+            print("   Please make sure you pressed the link button and try again.")
+            return False
+        
+        # Step 4: Test authentication
+        print("🧪 Testing authentication...")
+        if await auth.test_user(username):
+            print("✅ Authentication successful!")
+        else:
+            print("❌ Authentication test failed.")
+            return False
     
     # Step 5: Create .env file
     env_content = f"""# Hue MCP Server Configuration
@@ -236,6 +387,7 @@ HUE_TIMEOUT_CONNECT=5.0
 HUE_TIMEOUT_READ=10.0
 HUE_MAX_CONNECTIONS=10
 HUE_MAX_KEEPALIVE=5
+HUE_KEEPALIVE_EXPIRY=60.0
 
 # Rate Limiting Settings
 HUE_LIGHT_RATE_LIMIT=10
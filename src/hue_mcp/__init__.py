@@ -1,19 +1,44 @@
 """Philips Hue MCP Server - Model Context Protocol server for Hue light control."""
 
-from .hue_client import (
-    AsyncHueClient,
-    HueConnectionError,
-    HueError,
-    HueRateLimitError,
-    HueTimeoutError,
-    HueValidationError,
-)
-from .light_manager import (
-    HueResponse,
-    LightControlRequest,
-    LightManager,
-    RoomControlRequest,
-)
+import importlib
+from typing import Any
+
+from .config import ID_TO_LIGHT, ID_TO_ROOM, LIGHT_MAPPING, ROOM_MAPPINGS
+
+# Client and manager exports are imported on first access (PEP 562), so
+# importing the package or its config doesn't pull in httpx and the manager
+_LAZY_EXPORTS = {
+    "AsyncHueClient": ".hue_client",
+    "HueConnectionError": ".hue_client",
+    "HueError": ".hue_client",
+    "HueNotAvailableError": ".hue_client",
+    "HueRateLimitError": ".hue_client",
+    "HueTimeoutError": ".hue_client",
+    "HueValidationError": ".hue_client",
+    "Action": ".light_manager",
+    "HueResponse": ".light_manager",
+    "LightControlRequest": ".light_manager",
+    "LightManager": ".light_manager",
+    "LightResult": ".light_manager",
+    "RoomControlRequest": ".light_manager",
+    "get_manager": ".light_manager",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import a lazy export on first access and cache it on the package."""
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """List lazy exports alongside the already imported names."""
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
 
 __version__ = "1.0.0"
 __author__ = "Claude Code"
@@ -22,14 +47,22 @@ __description__ = (
 )
 
 __all__ = [
+    "Action",
     "HueResponse",
     "LightControlRequest",
     "RoomControlRequest",
     "AsyncHueClient",
     "LightManager",
+    "LightResult",
+    "get_manager",
     "HueError",
     "HueConnectionError",
     "HueTimeoutError",
     "HueValidationError",
     "HueRateLimitError",
+    "HueNotAvailableError",
+    "LIGHT_MAPPING",
+    "ROOM_MAPPINGS",
+    "ID_TO_LIGHT",
+    "ID_TO_ROOM",
 ]
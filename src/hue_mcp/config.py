@@ -2,16 +2,23 @@
 
 import ipaddress
 import os
+import re
+from functools import cached_property
+from types import MappingProxyType
 
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 load_dotenv()
 
+_USERNAME_RE = re.compile(r"[A-Za-z0-9\-]{10,}")
+
 
 class HueConfig(BaseModel):
     """Configuration for Hue bridge connection."""
 
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     bridge_ip: str = Field(
         default="192.168.1.64", description="IP address of the Hue bridge"
     )
@@ -32,6 +39,12 @@ class HueConfig(BaseModel):
     max_keepalive_connections: int = Field(
         default=5, ge=1, le=20, description="Maximum keepalive connections"
     )
+    keepalive_expiry: float = Field(
+        default=60.0,
+        ge=1.0,
+        le=300.0,
+        description="Seconds an idle bridge connection is kept for reuse",
+    )
     light_rate_limit: int = Field(
         default=10, ge=1, le=100, description="Light operations per second"
     )
@@ -42,19 +55,21 @@ class HueConfig(BaseModel):
     @field_validator("bridge_ip")
     @classmethod
     def validate_ip(cls, v):
-        """Validate IP address format."""
+        """Validate IPv4 address format."""
         try:
-            ipaddress.ip_address(v)
-            return v
-        except ValueError as e:
-            raise ValueError(f"Invalid IP address: {v}") from e
+            ipaddress.IPv4Address(v)
+        except ValueError:
+            raise ValueError(f"Invalid IP address: {v}") from None
+        return v
 
     @field_validator("username")
     @classmethod
     def validate_username(cls, v):
         """Validate username format."""
-        if not v or len(v) < 10:
-            raise ValueError("Username must be at least 10 characters long")
+        if not _USERNAME_RE.fullmatch(v):
+            raise ValueError(
+                "Username must be at least 10 letters, digits or dashes long"
+            )
         return v
 
     @field_validator("log_level")
@@ -79,13 +94,14 @@ class HueConfig(BaseModel):
             timeout_read=float(os.getenv("HUE_TIMEOUT_READ", "10.0")),
             max_connections=int(os.getenv("HUE_MAX_CONNECTIONS", "10")),
             max_keepalive_connections=int(os.getenv("HUE_MAX_KEEPALIVE", "5")),
+            keepalive_expiry=float(os.getenv("HUE_KEEPALIVE_EXPIRY", "60.0")),
             light_rate_limit=int(os.getenv("HUE_LIGHT_RATE_LIMIT", "10")),
             group_rate_limit=float(os.getenv("HUE_GROUP_RATE_LIMIT", "1.0")),
         )
 
-    @property
+    @cached_property
     def base_url(self) -> str:
-        """Get the base URL for Hue API."""
+        """Get the base URL for Hue API (built once; the config is frozen)."""
         return f"http://{self.bridge_ip}/api/{self.username}"
 
 
@@ -133,3 +149,18 @@ LIGHT_MAPPING = {
     "batcave_color_2": 16,
     "stove_2": 17,
 }
+
+# Reverse lookups, built once at import
+_ID_TO_LIGHT = {light_id: name for name, light_id in LIGHT_MAPPING.items()}
+_ID_TO_ROOM = {
+    light_id: room
+    for room, light_ids in ROOM_MAPPINGS.items()
+    if isinstance(light_ids, list)
+    for light_id in light_ids
+}
+
+# Shared tables are exposed read-only
+LIGHT_MAPPING = MappingProxyType(LIGHT_MAPPING)
+ROOM_MAPPINGS = MappingProxyType(ROOM_MAPPINGS)
+ID_TO_LIGHT = MappingProxyType(_ID_TO_LIGHT)
+ID_TO_ROOM = MappingProxyType(_ID_TO_ROOM)
@@ -1,10 +1,11 @@
 """Async Hue bridge client with connection pooling and rate limiting."""
 
 import asyncio
+import json
 import logging
+import random
 import time
-from contextlib import asynccontextmanager
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Sequence, Set, Tuple
 
 import httpx
 
@@ -12,6 +13,23 @@ from .config import config
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+if orjson is not None:
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+else:  # pragma: no cover
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+
+JSON_HEADERS = {"content-type": "application/json"}
+
 
 class HueError(Exception):
     """Base exception for all Hue-related errors."""
@@ -43,63 +61,99 @@ class HueRateLimitError(HueError):
     pass
 
 
+class HueNotAvailableError(HueError):
+    """The addressed resource (light, group, ...) doesn't exist on the bridge."""
+
+    pass
+
+
+# Hue API error type for "resource, /x/y, not available"
+_API_NOT_AVAILABLE = 3
+
+
+def _api_error(entry: Dict[str, Any]) -> HueError:
+    """Build a HueError from a Hue API error entry."""
+    error = entry["error"]
+    message = f"Hue API error: {error.get('description', 'Unknown error')}"
+    if error.get("type") == _API_NOT_AVAILABLE:
+        return HueNotAvailableError(message)
+    return HueError(message)
+
+
+def _parse_get_result(content: bytes) -> Any:
+    """Parse a GET response: the resource itself, or a list holding an error."""
+    result = _json_loads(content)
+    if type(result) is list and result and "error" in result[0]:
+        raise _api_error(result[0])
+    return result
+
+
+def _parse_put_result(content: bytes) -> Any:
+    """Parse a PUT response, which is a list of success/error entries.
+
+    The first entry is returned on success so callers can validate it.
+    """
+    result = _json_loads(content)
+    if type(result) is list and result:
+        first = result[0]
+        if "success" in first:
+            return first
+        if "error" in first:
+            raise _api_error(first)
+    # Empty list or unexpected format, return as-is
+    return result
+
+
+# Light state keys that each select a color mode; a newer one replaces the rest
+_COLOR_KEYS = ("xy", "ct", "hue", "sat")
+
+
+def _merge_light_state(pending: Dict[str, Any], state: Dict[str, Any]) -> None:
+    """Fold a newer light state into a queued one, last write wins."""
+    if state.get("on") is False:
+        # Turning off makes any queued brightness/color changes moot
+        pending.clear()
+    elif any(key in state for key in _COLOR_KEYS):
+        for key in _COLOR_KEYS:
+            pending.pop(key, None)
+    pending.update(state)
+
+
 class HueRateLimiter:
-    """Rate limiter for Hue API compliance."""
+    """Rate limiter for Hue API compliance.
+
+    Each limiter keeps the next free send slot. Reserving a slot is plain
+    arithmetic with no await in between, so it is atomic on the event loop
+    and needs no lock; callers only sleep if their slot lies in the future.
+    """
 
     def __init__(self):
-        # Token bucket for lights (10/second)
-        self.light_tokens = config.light_rate_limit
-        self.light_max_tokens = config.light_rate_limit
-        self.light_refill_rate = config.light_rate_limit
-        self.light_last_refill = time.time()
-        self.light_lock = asyncio.Lock()
+        # Light limiter (10/second), GCRA-style, in integer nanoseconds.
+        # Up to light_rate_limit calls may burst before callers are spaced out.
+        self._light_interval_ns = 10**9 // config.light_rate_limit
+        self._light_burst_ns = (config.light_rate_limit - 1) * self._light_interval_ns
+        self._light_next_ns = 0
 
-        # Simple rate limiter for groups (1/second)
-        self.group_last_call = 0
-        self.group_lock = asyncio.Lock()
+        # Group limiter (1/second), no burst
+        self._group_interval_ns = round(config.group_rate_limit * 10**9)
+        self._group_next_ns = 0
 
     async def acquire_light_token(self):
         """Acquire token for light operation."""
-        async with self.light_lock:
-            now = time.time()
-
-            # Refill tokens based on elapsed time
-            elapsed = now - self.light_last_refill
-            tokens_to_add = elapsed * self.light_refill_rate
-            self.light_tokens = min(
-                self.light_max_tokens, self.light_tokens + tokens_to_add
-            )
-            self.light_last_refill = now
-
-            # Wait if no tokens available
-            while self.light_tokens < 1:
-                wait_time = 1.0 / self.light_refill_rate
-                await asyncio.sleep(wait_time)
-
-                # Try to refill again
-                now = time.time()
-                elapsed = now - self.light_last_refill
-                tokens_to_add = elapsed * self.light_refill_rate
-                self.light_tokens = min(
-                    self.light_max_tokens, self.light_tokens + tokens_to_add
-                )
-                self.light_last_refill = now
-
-            # Consume token
-            self.light_tokens -= 1
+        now = time.monotonic_ns()
+        start = max(now, self._light_next_ns)
+        self._light_next_ns = start + self._light_interval_ns
+        delay_ns = start - self._light_burst_ns - now
+        if delay_ns > 0:
+            await asyncio.sleep(delay_ns / 1e9)
 
     async def acquire_group_token(self):
         """Acquire token for group operation."""
-        async with self.group_lock:
-            now = time.time()
-            time_since_last = now - self.group_last_call
-
-            if time_since_last < config.group_rate_limit:
-                # Wait until required time has passed
-                wait_time = config.group_rate_limit - time_since_last
-                await asyncio.sleep(wait_time)
-
-            self.group_last_call = time.time()
+        now = time.monotonic_ns()
+        start = max(now, self._group_next_ns)
+        self._group_next_ns = start + self._group_interval_ns
+        if start > now:
+            await asyncio.sleep((start - now) / 1e9)
 
 
 class AsyncHueClient:
@@ -107,39 +161,114 @@ class AsyncHueClient:
 
     def __init__(self):
         self.base_url = config.base_url
+
+        # Pre-built endpoint URLs so the hot paths don't re-format strings
+        url_prefix = self.base_url.replace("%", "%%")
+        self._lights_url = f"{self.base_url}/lights"
+        self._groups_url = f"{self.base_url}/groups"
+        self._config_url = f"{self.base_url}/config"
+        self._light_tmpl = f"{url_prefix}/lights/%d"
+        self._light_state_tmpl = f"{url_prefix}/lights/%d/state"
+        self._group_tmpl = f"{url_prefix}/groups/%d"
+        self._group_action_tmpl = f"{url_prefix}/groups/%d/action"
         self.timeout = httpx.Timeout(
             connect=config.timeout_connect,
             read=config.timeout_read,
             write=5.0,
             pool=5.0,
         )
+        # Tool calls arrive seconds to minutes apart; httpx's 5s default
+        # expiry would drop the idle connection and reconnect almost every call
         self.limits = httpx.Limits(
             max_connections=config.max_connections,
             max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
         )
+        # Hard cap on one attempt, including time spent waiting for a pooled
+        # connection, which httpx's per-phase timeouts don't bound as a whole
+        self._attempt_timeout = config.timeout_connect + config.timeout_read + 1.0
         self.rate_limiter = HueRateLimiter()
+        # Per-instance RNG so separate clients don't retry in lockstep
+        self._random = random.Random()
         self._client: Optional[httpx.AsyncClient] = None
+        # Short-lived cache of bridge listings: key -> (fetched_at, response)
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._cache_ttl = {"lights": 5.0, "groups": 5.0, "config": 60.0}
+        # Listing GETs in flight, shared by concurrent callers on a cache miss
+        self._pending_gets: Dict[str, asyncio.Future[Any]] = {}
+        # Single-light GETs: light id -> (fetched_at, response), trusted briefly
+        # so a burst of tool calls reads the light once
+        self._light_cache: Dict[int, Tuple[float, Any]] = {}
+        self._light_cache_ttl = 1.0
+        # Sorted light-id tuple -> bridge group id, loaded on first room command
+        self._group_index: Optional[Dict[Tuple[int, ...], int]] = None
+        # Light writes: lights with a PUT on the wire, and for each of those the
+        # merged state (and its waiters' future) to send once that PUT is done
+        self._writing: Set[int] = set()
+        self._queued_writes: Dict[int, Tuple[Dict[str, Any], asyncio.Future]] = {}
+        self._write_tasks: Set[asyncio.Task] = set()
 
     async def __aenter__(self):
         """Async context manager entry."""
-        self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        await self._ensure_client()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        if self._client:
-            await self._client.aclose()
-
-    @asynccontextmanager
-    async def _get_client(self):
-        """Get HTTP client (context manager for standalone usage)."""
-        if self._client:
-            yield self._client
-        else:
-            async with httpx.AsyncClient(
-                timeout=self.timeout, limits=self.limits
-            ) as client:
-                yield client
+        await self.close()
+
+    async def _ensure_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use.
+
+        Nothing is awaited between the check and the assignment, so concurrent
+        callers can't create two clients and no lock (which Python < 3.10 would
+        bind to the loop current at construction) is needed.
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                transport=self._build_transport(),
+                trust_env=False,
+                headers={"accept-encoding": "identity"},
+            )
+        return self._client
+
+    def _build_transport(self) -> httpx.AsyncHTTPTransport:
+        """Build the transport for plain-HTTP LAN traffic to the bridge.
+
+        The bridge speaks HTTP/1.1 only, is never reached through a proxy and
+        doesn't compress responses. Retries are left to _safe_request so they
+        don't compound. A numeric bridge_ip is connected to directly (anyio
+        skips getaddrinfo for IP literals), so no custom resolver is needed.
+        The pool limits must live on the transport, since AsyncClient ignores
+        its own limits once a transport is supplied.
+        """
+        return httpx.AsyncHTTPTransport(
+            verify=False,  # no TLS to the bridge; skips loading CA bundles
+            http1=True,
+            http2=False,
+            limits=self.limits,
+            trust_env=False,
+            retries=0,
+        )
+
+    async def close(self) -> None:
+        """Close the shared HTTP client and release pooled connections."""
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Compute a jittered retry delay, honouring Retry-After when given."""
+        delay = 0.0
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = 0.0
+        if delay <= 0:
+            delay = 0.5 * (2**attempt)
+        return delay + self._random.uniform(0, delay * 0.25)
 
     async def _safe_request(
         self,
@@ -148,107 +277,246 @@ class AsyncHueClient:
         data: Optional[Dict[str, Any]] = None,
         retries: int = 3,
     ) -> Dict[str, Any]:
-        """Make safe request to Hue API with retries."""
+        """Make safe request to Hue API with retries.
+
+        Each attempt is bounded by an overall deadline (connect + read timeouts
+        plus one second) on top of httpx's per-phase timeouts, so a request
+        queued behind a busy connection pool still fails in bounded time.
+        Either kind of timeout is retried and finally raised as HueTimeoutError.
+        """
+
+        method = method.upper()
+        if method == "GET":
+            parse = _parse_get_result
+        elif method == "PUT":
+            parse = _parse_put_result
+            body = _json_dumps(data)
+        else:
+            raise ValueError(f"Unsupported method: {method}")
 
         for attempt in range(retries):
             try:
-                async with self._get_client() as client:
-                    if method.upper() == "GET":
-                        response = await client.get(endpoint)
-                    elif method.upper() == "PUT":
-                        response = await client.put(endpoint, json=data)
-                    else:
-                        raise ValueError(f"Unsupported method: {method}")
-
-                    # Handle specific status codes
-                    if response.status_code == 429:
-                        # Rate limited - wait and retry
-                        await asyncio.sleep(1.0 * (2**attempt))
-                        continue
-                    elif response.status_code == 404:
-                        raise HueValidationError(f"Resource not found: {endpoint}")
-                    elif response.status_code == 401:
-                        raise HueConnectionError("Invalid username/authentication")
-
-                    response.raise_for_status()
-                    result = response.json()
-
-                    # Check for Hue API errors in response
-                    if isinstance(result, list) and result and "error" in result[0]:
-                        error = result[0]["error"]
-                        raise HueError(
-                            f"Hue API error: {error.get('description', 'Unknown error')}"
+                # Non-streaming get/put read the whole body before returning, so
+                # the connection goes back to the pool even if we raise below.
+                client = await self._ensure_client()
+                if method == "GET":
+                    pending = client.get(endpoint)
+                else:
+                    pending = client.put(endpoint, content=body, headers=JSON_HEADERS)
+                response = await asyncio.wait_for(pending, self._attempt_timeout)
+
+                # Handle specific status codes
+                if response.status_code == 429:
+                    if attempt == retries - 1:
+                        raise HueRateLimitError(
+                            f"Rate limited by bridge after {retries} attempts"
                         )
+                    # Rate limited - wait and retry
+                    retry_after = response.headers.get("retry-after")
+                    await asyncio.sleep(self._backoff_delay(attempt, retry_after))
+                    continue
+                elif response.status_code == 404:
+                    raise HueValidationError(f"Resource not found: {endpoint}")
+                elif response.status_code == 401:
+                    raise HueConnectionError("Invalid username/authentication")
+
+                if response.status_code >= 400:
+                    response.raise_for_status()
+                return parse(response.content)
 
-                    # For PUT requests (light control), Hue API returns a list of success/error objects
-                    # For GET requests, it returns the data directly
-                    if isinstance(result, list) and method.upper() == "PUT":
-                        # Handle list of responses from PUT operations
-                        if result and isinstance(result[0], dict):
-                            if "success" in result[0]:
-                                # Return the success object for validation
-                                return result[0]
-                            elif "error" in result[0]:
-                                error = result[0]["error"]
-                                raise HueError(
-                                    f"Hue API error: {error.get('description', 'Unknown error')}"
-                                )
-                        # If it's an empty list or unexpected format, return as-is
-                        return result
-
-                    return result
-
-            except httpx.TimeoutException as e:
+            except (httpx.TimeoutException, asyncio.TimeoutError) as e:
                 if attempt == retries - 1:
                     raise HueTimeoutError(
                         f"Request timeout after {retries} attempts: {e}"
                     ) from e
-                await asyncio.sleep(0.5 * (2**attempt))
+                await asyncio.sleep(self._backoff_delay(attempt))
 
             except httpx.RequestError as e:
                 if attempt == retries - 1:
                     raise HueConnectionError(
                         f"Request failed after {retries} attempts: {e}"
                     ) from e
-                await asyncio.sleep(0.5 * (2**attempt))
+                await asyncio.sleep(self._backoff_delay(attempt))
 
         raise HueConnectionError("Unexpected error in request handling")
 
+    def _cache_lookup(self, key: str) -> Optional[Any]:
+        """Return a cached response if it is still within its TTL."""
+        hit = self._cache.get(key)
+        if hit is not None and time.monotonic() - hit[0] < self._cache_ttl[key]:
+            return hit[1]
+        return None
+
+    async def _cached_get(self, key: str, endpoint: str) -> Dict[str, Any]:
+        """GET an endpoint, serving repeat calls from the TTL cache.
+
+        Concurrent misses for the same key share one request to the bridge.
+        """
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            return cached
+
+        task = self._pending_gets.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_into_cache(key, endpoint))
+            self._pending_gets[key] = task
+            task.add_done_callback(lambda _: self._pending_gets.pop(key, None))
+        # Shielded so one caller giving up doesn't cancel the others' fetch
+        return await asyncio.shield(task)
+
+    async def _fetch_into_cache(self, key: str, endpoint: str) -> Dict[str, Any]:
+        """GET an endpoint and store the response under key."""
+        now = time.monotonic()
+
+        try:
+            result = await self._safe_request(endpoint, "GET")
+        except HueError:
+            # The bridge may have been reset or replaced; don't trust old data
+            self.invalidate_cache()
+            raise
+        self._cache[key] = (now, result)
+        return result
+
+    def invalidate_cache(self) -> None:
+        """Drop all cached bridge listings, light states and the group index."""
+        self._cache.clear()
+        self._light_cache.clear()
+        self._group_index = None
+
     async def get_lights(self) -> Dict[str, Any]:
-        """Get all lights from the bridge."""
-        endpoint = f"{self.base_url}/lights"
-        return await self._safe_request(endpoint, "GET")
+        """Get all lights from the bridge (cached for a few seconds)."""
+        return await self._cached_get("lights", self._lights_url)
 
     async def get_light_state(self, light_id: int) -> Dict[str, Any]:
-        """Get state of a specific light."""
-        endpoint = f"{self.base_url}/lights/{light_id}"
-        return await self._safe_request(endpoint, "GET")
+        """Get state of a specific light.
+
+        Served from a fresh /lights listing or a response under a second old;
+        any write to the light drops its entry.
+        """
+        lights = self._cache_lookup("lights")
+        if lights is not None:
+            light = lights.get(str(light_id))
+            if light is not None:
+                return light
+
+        now = time.monotonic()
+        hit = self._light_cache.get(light_id)
+        if hit is not None and now - hit[0] < self._light_cache_ttl:
+            return hit[1]
+
+        result = await self._safe_request(self._light_tmpl % light_id, "GET")
+        self._light_cache[light_id] = (now, result)
+        return result
 
     async def control_light(
         self, light_id: int, state: Dict[str, Any]
     ) -> Dict[str, Any]:
-        """Control a specific light with rate limiting."""
+        """Control a specific light with rate limiting.
+
+        A write issued while another one to the same light is on the wire is
+        queued; further writes merge into it (last write wins), so a burst of
+        slider updates costs two PUTs rather than one per update.
+        """
+        queued = self._queued_writes.get(light_id)
+        if queued is not None:
+            _merge_light_state(queued[0], state)
+            return await asyncio.shield(queued[1])
+        if light_id in self._writing:
+            future = asyncio.get_running_loop().create_future()
+            self._queued_writes[light_id] = (dict(state), future)
+            return await asyncio.shield(future)
+
+        self._writing.add(light_id)
+        try:
+            return await self._write_light_state(light_id, state)
+        finally:
+            self._finish_light_write(light_id)
+
+    def _finish_light_write(self, light_id: int) -> None:
+        """Send the write queued behind the one that just finished, if any."""
+        queued = self._queued_writes.pop(light_id, None)
+        if queued is None:
+            self._writing.discard(light_id)
+            return
+        task = asyncio.ensure_future(self._send_queued_write(light_id, *queued))
+        self._write_tasks.add(task)
+        task.add_done_callback(self._write_tasks.discard)
+
+    async def _send_queued_write(
+        self, light_id: int, state: Dict[str, Any], future: asyncio.Future
+    ) -> None:
+        """Send a merged write and hand its outcome to every waiter."""
+        try:
+            future.set_result(await self._write_light_state(light_id, state))
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Every waiter may have given up; live ones still get the error
+            # through their shield, so mark it retrieved to avoid a warning
+            future.exception()
+        finally:
+            self._finish_light_write(light_id)
+
+    async def _write_light_state(
+        self, light_id: int, state: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """PUT a light state with rate limiting."""
         await self.rate_limiter.acquire_light_token()
-        endpoint = f"{self.base_url}/lights/{light_id}/state"
-        return await self._safe_request(endpoint, "PUT", state)
+        endpoint = self._light_state_tmpl % light_id
+        try:
+            return await self._safe_request(endpoint, "PUT", state)
+        finally:
+            # Cached light states are stale (or uncertain) after a write
+            self._cache.pop("lights", None)
+            self._light_cache.pop(light_id, None)
 
     async def control_group(
         self, group_id: int, action: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Control a group of lights with rate limiting."""
         await self.rate_limiter.acquire_group_token()
-        endpoint = f"{self.base_url}/groups/{group_id}/action"
-        return await self._safe_request(endpoint, "PUT", action)
+        endpoint = self._group_action_tmpl % group_id
+        try:
+            return await self._safe_request(endpoint, "PUT", action)
+        except HueNotAvailableError:
+            # The group was deleted or renumbered; resolve rooms afresh
+            self._group_index = None
+            raise
+        finally:
+            self._cache.pop("lights", None)
+            self._cache.pop("groups", None)
+            self._light_cache.clear()
+
+    async def find_group_id(self, light_ids: Sequence[int]) -> Optional[int]:
+        """Find a bridge group containing exactly the given lights."""
+        if self._group_index is None:
+            groups = await self.get_groups()
+            index: Dict[Tuple[int, ...], int] = {}
+            for group_id, group in groups.items():
+                key = tuple(sorted(int(light) for light in group.get("lights", [])))
+                index.setdefault(key, int(group_id))
+            self._group_index = index
+        return self._group_index.get(tuple(sorted(light_ids)))
 
     async def get_groups(self) -> Dict[str, Any]:
-        """Get all groups from the bridge."""
-        endpoint = f"{self.base_url}/groups"
-        return await self._safe_request(endpoint, "GET")
+        """Get all groups from the bridge (cached for a few seconds)."""
+        return await self._cached_get("groups", self._groups_url)
+
+    async def get_group(self, group_id: int) -> Dict[str, Any]:
+        """Get live state of a specific group (group 0 is all lights)."""
+        try:
+            return await self._safe_request(self._group_tmpl % group_id, "GET")
+        except HueNotAvailableError:
+            # The group was deleted or renumbered; resolve rooms afresh
+            self._group_index = None
+            self._cache.pop("groups", None)
+            raise
 
     async def get_config(self) -> Dict[str, Any]:
-        """Get bridge configuration."""
-        endpoint = f"{self.base_url}/config"
-        return await self._safe_request(endpoint, "GET")
+        """Get bridge configuration (cached for a minute)."""
+        return await self._cached_get("config", self._config_url)
 
     async def test_connection(self) -> bool:
         """Test connection to the bridge."""
@@ -1,27 +1,128 @@
 """Light control manager with room mappings and business logic."""
 
 import asyncio
+import functools
+import json
 import logging
-from typing import Any, Dict, List, Optional
-
-from pydantic import BaseModel, Field
+import time
+from dataclasses import asdict, dataclass, is_dataclass
+from enum import Enum
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from pydantic import BaseModel, ConfigDict, Field
 
 from .config import LIGHT_MAPPING, ROOM_MAPPINGS
-from .hue_client import AsyncHueClient, HueValidationError
+from .hue_client import (
+    AsyncHueClient,
+    HueConnectionError,
+    HueError,
+    HueNotAvailableError,
+    HueRateLimitError,
+    HueTimeoutError,
+    HueValidationError,
+)
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+# Upper bound on concurrent per-light commands within one room operation
+MAX_CONCURRENT_LIGHTS = 5
+
+# Seconds the capability bitmaps are trusted before being re-fetched
+CAPABILITY_TTL = 300.0
+
+# Seconds a light's last written on/off state is trusted for toggles; a
+# wall switch or another app can change it behind our back
+LAST_ON_TTL = 30.0
+
+# Light types (casefolded) known to support color temperature / full color
+_CT_TYPES = frozenset(
+    {
+        "color temperature light",
+        "extended color light",
+        "color light",
+        "tunable white light",
+    }
+)
+_COLOR_TYPES = frozenset({"extended color light", "color light"})
+
+# sRGB gamma expansion for every 8-bit channel value (linear above 10/255)
+_GAMMA_LUT: Tuple[float, ...] = tuple(
+    ((v / 255 + 0.055) / 1.055) ** 2.4 if v > 10 else (v / 255) / 12.92
+    for v in range(256)
+)
+
+# Request defaults for brightness and color temperature
+DEFAULT_BRIGHTNESS = 200
+DEFAULT_COLOR_TEMP = 366
+
+# Prebuilt states for the most common commands, shared by every caller; light
+# states are never mutated once built (queued writes merge into a copy)
+_OFF_STATE: Dict[str, Any] = {"on": False}
+_ON_DEFAULT_STATE: Dict[str, Any] = {"on": True, "bri": DEFAULT_BRIGHTNESS}
+_ON_DEFAULT_CT_STATE: Dict[str, Any] = {
+    "on": True,
+    "bri": DEFAULT_BRIGHTNESS,
+    "ct": DEFAULT_COLOR_TEMP,
+}
+
+# Light IDs assumed for all-lights (group 0) operations until the bridge's
+# actual lights have been listed: the configured ones
+_ALL_LIGHT_IDS: Tuple[int, ...] = tuple(sorted(LIGHT_MAPPING.values()))
+
+# Room lookups, frozen once at import
+_ROOM_NAMES = frozenset(ROOM_MAPPINGS)
+# Rendered once for unknown-room errors, in mapping order
+_ROOM_NAMES_TEXT = str(list(ROOM_MAPPINGS))
+_ROOM_LIGHTS: Dict[str, Tuple[int, ...]] = {
+    room: tuple(light_ids)
+    for room, light_ids in ROOM_MAPPINGS.items()
+    if isinstance(light_ids, list)
+}
+
+
+class Action(str, Enum):
+    """Light/room action.
+
+    String-valued so tool arguments like "on" validate directly; code past the
+    request models compares members by identity.
+    """
+
+    ON = "on"
+    OFF = "off"
+    TOGGLE = "toggle"
+
+    def __str__(self) -> str:
+        return self.value
+
 
 class LightControlRequest(BaseModel):
     """Request model for individual light control."""
 
+    model_config = ConfigDict(frozen=True)
+
     light_id: int = Field(ge=1, le=17, description="Light ID (1-17)")
-    action: str = Field(description="Light action: on, off, toggle")
+    action: Action = Field(description="Light action: on, off, toggle")
     brightness: Optional[int] = Field(
-        default=200, ge=1, le=254, description="Brightness (1-254)"
+        default=DEFAULT_BRIGHTNESS, ge=1, le=254, description="Brightness (1-254)"
     )
     color_temp: Optional[int] = Field(
-        default=366, ge=154, le=500, description="Color temperature"
+        default=DEFAULT_COLOR_TEMP, ge=154, le=500, description="Color temperature"
     )
     # RGB color support
     red: Optional[int] = Field(
@@ -45,13 +146,15 @@ class LightControlRequest(BaseModel):
 class RoomControlRequest(BaseModel):
     """Request model for room control."""
 
+    model_config = ConfigDict(frozen=True)
+
     room: str = Field(description="Room name")
-    action: str = Field(description="Room action: on, off, toggle")
+    action: Action = Field(description="Room action: on, off, toggle")
     brightness: Optional[int] = Field(
-        default=200, ge=1, le=254, description="Brightness (1-254)"
+        default=DEFAULT_BRIGHTNESS, ge=1, le=254, description="Brightness (1-254)"
     )
     color_temp: Optional[int] = Field(
-        default=366, ge=154, le=500, description="Color temperature"
+        default=DEFAULT_COLOR_TEMP, ge=154, le=500, description="Color temperature"
     )
     # RGB color support
     red: Optional[int] = Field(
@@ -72,14 +175,94 @@ class RoomControlRequest(BaseModel):
     )
 
 
-class HueResponse(BaseModel):
-    """Standard response model for Hue operations."""
+def _json_default(obj: Any) -> Any:
+    """Encode nested result dataclasses for the stdlib JSON fallback."""
+    if is_dataclass(obj):
+        return asdict(obj)
+    return str(obj)
+
+
+@dataclass
+class HueResponse:
+    """Standard response model for Hue operations.
+
+    Built only by the server itself, so it is a plain dataclass rather than a
+    validated model; tool boundaries serialize it with ``to_json``.
+    """
 
     success: bool
     message: str
     data: Optional[Dict[str, Any]] = None
     lights_affected: Optional[List[int]] = None
 
+    def to_json(self) -> str:
+        """Serialize the response (and any nested results) to JSON.
+
+        Unset optional fields are left out to keep tool payloads small.
+        """
+        payload: Dict[str, Any] = {"success": self.success, "message": self.message}
+        if self.data is not None:
+            payload["data"] = self.data
+        if self.lights_affected is not None:
+            payload["lights_affected"] = self.lights_affected
+        if orjson is not None:
+            return orjson.dumps(payload, default=str).decode()
+        return json.dumps(  # pragma: no cover
+            payload, default=_json_default, separators=(",", ":")
+        )
+
+
+# Tool reply for unexpected failures; fully static, so encoded once
+UNEXPECTED_ERROR_JSON = HueResponse(
+    success=False,
+    message="An unexpected error occurred",
+    data={"error_type": "UnexpectedError"},
+).to_json()
+
+
+@dataclass
+class LightResult:
+    """Outcome of one light's command within a room operation."""
+
+    light_id: int
+    success: bool
+    result: Optional[HueResponse] = None
+    error: Optional[str] = None
+
+
+def _room_data(successful: int, failed_ids: List[int]) -> Dict[str, Any]:
+    """Build the data payload shared by every room control path."""
+    return {
+        "successful_operations": successful,
+        "failed_operations": len(failed_ids),
+        "failed_light_ids": failed_ids,
+    }
+
+
+def _error_response(
+    method: Callable[..., Awaitable[HueResponse]]
+) -> Callable[..., Awaitable[HueResponse]]:
+    """Turn any exception raised by a manager method into a failed HueResponse.
+
+    Rejected input (an unknown room or light) is the caller's mistake and is
+    logged as a warning; bridge and unexpected failures are logged as errors.
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs) -> HueResponse:
+        try:
+            return await method(self, *args, **kwargs)
+        except Exception as e:
+            if isinstance(e, HueValidationError):
+                logger.warning("%s rejected: %s", method.__name__, e)
+            else:
+                logger.error("%s failed: %s", method.__name__, e)
+            return HueResponse(
+                success=False, message=str(e), data={"error_type": type(e).__name__}
+            )
+
+    return wrapper
+
 
 class LightManager:
     """Manager for Hue light control operations."""
@@ -87,6 +270,129 @@ class LightManager:
     def __init__(self):
         self.room_mappings = ROOM_MAPPINGS
         self.light_mapping = LIGHT_MAPPING
+        # Capability bitmaps: bit N is set when light N is known / supports
+        # color / supports color temperature. Bridge IDs fit well within 32 bits.
+        self.known_mask = 0
+        self.color_mask = 0
+        self.ct_mask = 0
+        self._capabilities_at = 0.0
+        # Lights group 0 reaches, replaced by the bridge's IDs once listed
+        self._all_ids: Tuple[int, ...] = _ALL_LIGHT_IDS
+        # Light ID -> (last known on/off, recorded at), so toggle can skip a GET
+        self._last_on: Dict[int, Tuple[bool, float]] = {}
+        # Concurrent per-light commands; shrinks while the bridge pushes back
+        self._inflight = 0
+        self._max_inflight = MAX_CONCURRENT_LIGHTS
+        # Created on first use: the shared manager may be built outside a
+        # running loop, and on Python < 3.10 a Condition binds to it at creation
+        self._slots: Optional[asyncio.Condition] = None
+        # Room commands in flight, keyed by the (frozen, hashable) request
+        self._pending_rooms: Dict[RoomControlRequest, asyncio.Future[HueResponse]] = {}
+        # Long-lived client, opened on first use so its connection pool is reused
+        self._client: Optional[AsyncHueClient] = None
+
+    def _get_client(self) -> AsyncHueClient:
+        """Return the shared client, creating it on first use."""
+        if self._client is None:
+            self._client = AsyncHueClient()
+        return self._client
+
+    def _get_slots(self) -> asyncio.Condition:
+        """Return the slot condition, creating it in the running loop."""
+        if self._slots is None:
+            self._slots = asyncio.Condition()
+        return self._slots
+
+    async def aclose(self) -> None:
+        """Close the shared client's connections."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def _acquire_slot(self) -> None:
+        """Wait for a free per-light command slot."""
+        slots = self._get_slots()
+        async with slots:
+            await slots.wait_for(lambda: self._inflight < self._max_inflight)
+            self._inflight += 1
+
+    async def _release_slot(self, throttled: bool = False) -> None:
+        """Release a slot, adapting the limit to how the bridge responded."""
+        slots = self._get_slots()
+        async with slots:
+            self._inflight -= 1
+            if throttled:
+                self._max_inflight = max(1, self._max_inflight - 1)
+            elif self._max_inflight < MAX_CONCURRENT_LIGHTS:
+                self._max_inflight += 1
+            slots.notify_all()
+
+    def _remember_capabilities(
+        self, light_id: int, light_info: Dict[str, Any]
+    ) -> Tuple[bool, bool]:
+        """Record and return a light's (supports color, supports ct) flags."""
+        if not self.known_mask:
+            self._capabilities_at = time.monotonic()
+        bit = 1 << light_id
+        supports_color = self._supports_color(light_info)
+        supports_ct = self._supports_color_temp(light_info)
+        self.known_mask |= bit
+        self.color_mask = self.color_mask & ~bit | supports_color << light_id
+        self.ct_mask = self.ct_mask & ~bit | supports_ct << light_id
+        return supports_color, supports_ct
+
+    def _remember_lights(self, lights: Dict[str, Any]) -> None:
+        """Record the IDs and capabilities of every light in a /lights response."""
+        for light_id, info in lights.items():
+            self._remember_capabilities(int(light_id), info)
+        if lights:
+            self._all_ids = tuple(sorted(map(int, lights)))
+
+    async def prime_capabilities(self) -> None:
+        """Fetch every light once and fill the capability bitmaps."""
+        lights = await self._get_client().get_lights()
+        self.invalidate_capabilities()
+        self._remember_lights(lights)
+
+    def _supports_color_id(self, light_id: int) -> bool:
+        """Check the color bitmap for a light."""
+        return bool((self.color_mask >> light_id) & 1)
+
+    def _supports_color_temp_id(self, light_id: int) -> bool:
+        """Check the color temperature bitmap for a light."""
+        return bool((self.ct_mask >> light_id) & 1)
+
+    def _known_lights(self, mask: int) -> bool:
+        """Check that every light in a bitmask has fresh capability flags."""
+        if self.known_mask & mask != mask:
+            return False
+        if time.monotonic() - self._capabilities_at >= CAPABILITY_TTL:
+            self.invalidate_capabilities()
+            return False
+        return True
+
+    def _cached_capabilities(self, light_id: int) -> Optional[Tuple[bool, bool]]:
+        """Return a light's cached capability flags, or None if unknown/stale."""
+        if not self._known_lights(1 << light_id):
+            return None
+        return self._supports_color_id(light_id), self._supports_color_temp_id(light_id)
+
+    def invalidate_capabilities(self) -> None:
+        """Forget cached light capabilities, e.g. after lights were replaced."""
+        self.known_mask = self.color_mask = self.ct_mask = 0
+
+    def _remember_on(self, light_ids: Iterable[int], on: bool) -> None:
+        """Record the on/off state just written to or read from lights."""
+        now = time.monotonic()
+        for light_id in light_ids:
+            self._last_on[light_id] = (on, now)
+
+    def _known_on(self, light_id: int) -> Optional[bool]:
+        """Return a light's recent on/off state, or None if unknown/stale."""
+        entry = self._last_on.get(light_id)
+        if entry is None or time.monotonic() - entry[1] >= LAST_ON_TTL:
+            return None
+        return entry[0]
 
     def _validate_light_id(self, light_id: int) -> None:
         """Validate light ID is in valid range."""
@@ -95,75 +401,36 @@ class LightManager:
 
     def _validate_room(self, room: str) -> None:
         """Validate room name."""
-        if room not in self.room_mappings:
-            available_rooms = list(self.room_mappings.keys())
+        if room not in _ROOM_NAMES:
             raise HueValidationError(
-                f"Unknown room '{room}'. Available rooms: {available_rooms}"
+                f"Unknown room '{room}'. Available rooms: {_ROOM_NAMES_TEXT}"
             )
 
     def _supports_color_temp(self, light_info: Dict[str, Any]) -> bool:
         """Check if light supports color temperature."""
-        # Check the light type
-        light_type = light_info.get("type", "").lower()
-
-        # Common light types that support color temperature
-        color_temp_types = [
-            "color temperature light",
-            "extended color light",
-            "color light",
-            "tunable white light",
-        ]
-
-        # Check if type matches known color temp supporting types
-        if any(ct_type in light_type for ct_type in color_temp_types):
+        # Check if type is a known color temp supporting type
+        if light_info.get("type", "").casefold() in _CT_TYPES:
             return True
 
-        # Check capabilities if available
-        capabilities = light_info.get("capabilities", {})
-        control = capabilities.get("control", {})
-
         # Check if ct (color temperature) is in the control capabilities
-        if "ct" in control:
-            return True
-
-        return False
+        return "ct" in light_info.get("capabilities", {}).get("control", {})
 
     def _supports_color(self, light_info: Dict[str, Any]) -> bool:
         """Check if light supports color (RGB/HSB)."""
-        # Check the light type
-        light_type = light_info.get("type", "").lower()
-
-        # Common light types that support color
-        color_types = [
-            "extended color light",
-            "color light",
-        ]
-
-        # Check if type matches known color supporting types
-        if any(color_type in light_type for color_type in color_types):
+        # Check if type is a known color supporting type
+        if light_info.get("type", "").casefold() in _COLOR_TYPES:
             return True
 
-        # Check capabilities if available
-        capabilities = light_info.get("capabilities", {})
-        control = capabilities.get("control", {})
-
         # Check if xy, hue, or sat are in the control capabilities
-        if any(key in control for key in ["xy", "hue", "sat"]):
-            return True
-
-        return False
+        control = light_info.get("capabilities", {}).get("control", {})
+        return "xy" in control or "hue" in control or "sat" in control
 
     def _rgb_to_xy(self, red: int, green: int, blue: int) -> tuple[float, float]:
         """Convert RGB values to Hue xy color space."""
-        # Normalize RGB values to 0-1
-        r = red / 255.0
-        g = green / 255.0
-        b = blue / 255.0
-
-        # Apply gamma correction
-        r = pow((r + 0.055) / 1.055, 2.4) if r > 0.04045 else r / 12.92
-        g = pow((g + 0.055) / 1.055, 2.4) if g > 0.04045 else g / 12.92
-        b = pow((b + 0.055) / 1.055, 2.4) if b > 0.04045 else b / 12.92
+        # Normalize and gamma-correct via the precomputed table
+        r = _GAMMA_LUT[red]
+        g = _GAMMA_LUT[green]
+        b = _GAMMA_LUT[blue]
 
         # Convert to XYZ color space
         X = r * 0.4124564 + g * 0.3575761 + b * 0.1804375
@@ -171,11 +438,12 @@ class LightManager:
         Z = r * 0.0193339 + g * 0.1191920 + b * 0.9503041
 
         # Convert to xy chromaticity coordinates
-        if (X + Y + Z) == 0:
+        total = X + Y + Z
+        if total == 0:
             return (0.0, 0.0)
         
-        x = X / (X + Y + Z)
-        y = Y / (X + Y + Z)
+        x = X / total
+        y = Y / total
 
         # Ensure values are within Hue's acceptable range
         x = max(0.0, min(1.0, x))
@@ -185,7 +453,7 @@ class LightManager:
 
     def _build_light_state(
         self,
-        action: str,
+        action: Action,
         brightness: Optional[int] = None,
         color_temp: Optional[int] = None,
         red: Optional[int] = None,
@@ -193,291 +461,445 @@ class LightManager:
         blue: Optional[int] = None,
         hue: Optional[int] = None,
         saturation: Optional[int] = None,
-        light_info: Optional[Dict[str, Any]] = None,
+        supports_color: bool = False,
+        supports_ct: bool = False,
     ) -> Dict[str, Any]:
-        """Build light state dictionary from parameters."""
-        state = {}
-
-        if action == "on":
+        """Build light state dictionary from parameters.
+
+        Off and plain default on return shared prebuilt dicts; the result must
+        not be mutated.
+        """
+        if action is Action.OFF:
+            return _OFF_STATE
+        if (
+            action is Action.ON
+            and brightness == DEFAULT_BRIGHTNESS
+            and color_temp == DEFAULT_COLOR_TEMP
+            and red is None
+            and green is None
+            and blue is None
+            and hue is None
+            and saturation is None
+        ):
+            return _ON_DEFAULT_CT_STATE if supports_ct else _ON_DEFAULT_STATE
+
+        state: Dict[str, Any] = {}
+        if action is Action.ON:
             state["on"] = True
             if brightness is not None:
                 state["bri"] = brightness
-            
+
             # Handle color settings - priority: RGB > hue/sat > color_temp
-            if light_info is not None and self._supports_color(light_info):
-                # RGB color takes priority
-                if red is not None and green is not None and blue is not None:
-                    x, y = self._rgb_to_xy(red, green, blue)
-                    state["xy"] = [x, y]
-                # Hue/saturation color
-                elif hue is not None and saturation is not None:
-                    state["hue"] = hue
-                    state["sat"] = saturation
-                # Fallback to color temperature if supported
-                elif (
-                    color_temp is not None
-                    and self._supports_color_temp(light_info)
-                ):
-                    state["ct"] = color_temp
-            # Non-color lights can still use color temperature
-            elif (
-                color_temp is not None
-                and light_info is not None
-                and self._supports_color_temp(light_info)
+            if (
+                supports_color
+                and red is not None
+                and green is not None
+                and blue is not None
             ):
+                x, y = self._rgb_to_xy(red, green, blue)
+                state["xy"] = [x, y]
+            elif supports_color and hue is not None and saturation is not None:
+                state["hue"] = hue
+                state["sat"] = saturation
+            # Non-color lights can still use color temperature
+            elif supports_ct and color_temp is not None:
                 state["ct"] = color_temp
-        elif action == "off":
-            state["on"] = False
-        elif action == "toggle":
-            # For toggle, we'll need to get current state first
-            # This will be handled in the control methods
-            pass
-        else:
-            raise HueValidationError(
-                f"Invalid action '{action}'. Must be 'on', 'off', or 'toggle'."
-            )
+        # Toggle is resolved to on/off by the control methods before this
 
         return state
 
+    @_error_response
     async def control_light(self, request: LightControlRequest) -> HueResponse:
         """Control individual light."""
-        try:
-            self._validate_light_id(request.light_id)
-
-            async with AsyncHueClient() as client:
-                # Get light info to determine type and capabilities
-                light_info = await client.get_light_state(request.light_id)
-
-                # Handle toggle action - need current state
-                if request.action == "toggle":
-                    current_on = light_info.get("state", {}).get("on", False)
-                    new_action = "off" if current_on else "on"
-                    state = self._build_light_state(
-                        new_action, 
-                        request.brightness, 
-                        request.color_temp, 
-                        request.red,
-                        request.green,
-                        request.blue,
-                        request.hue,
-                        request.saturation,
-                        light_info
-                    )
-                else:
-                    state = self._build_light_state(
-                        request.action,
-                        request.brightness,
-                        request.color_temp,
-                        request.red,
-                        request.green,
-                        request.blue,
-                        request.hue,
-                        request.saturation,
-                        light_info,
-                    )
-
-                # Execute light control
-                result = await client.control_light(request.light_id, state)
-
-                logger.info(
-                    f"Successfully controlled light {request.light_id}: {request.action}"
-                )
-
-                return HueResponse(
-                    success=True,
-                    message=f"Light {request.light_id} {request.action} successfully",
-                    data=result,
-                    lights_affected=[request.light_id],
-                )
+        # LightControlRequest already validated the light ID and action
+        client = self._get_client()
+        return await self._do_control_light(client, request.light_id, request)
 
-        except Exception as e:
-            logger.error(f"Failed to control light {request.light_id}: {e}")
-            return HueResponse(
-                success=False, message=str(e), data={"error_type": type(e).__name__}
+    async def _do_control_light(
+        self,
+        client: AsyncHueClient,
+        light_id: int,
+        request: Union[LightControlRequest, RoomControlRequest],
+        states: Optional[Dict[Tuple[Action, bool, bool], Dict[str, Any]]] = None,
+    ) -> HueResponse:
+        """Control one already validated light with the request's settings.
+
+        A room operation passes a shared ``states`` dict so the light state is
+        built once per action and capability set instead of once per light.
+        """
+        action = request.action
+
+        # Light capabilities decide which color fields are sent, and toggle
+        # needs the on/off state; both come from cache when fresh, else a GET
+        flags = self._cached_capabilities(light_id)
+        current_on = self._known_on(light_id) if action is Action.TOGGLE else False
+        if flags is None or current_on is None:
+            light_info = await client.get_light_state(light_id)
+            flags = self._remember_capabilities(light_id, light_info)
+            current_on = light_info.get("state", {}).get("on", False)
+
+        # Handle toggle action - flip the current state
+        if action is Action.TOGGLE:
+            new_action = Action.OFF if current_on else Action.ON
+        else:
+            new_action = action
+
+        key = (new_action,) + flags
+        state = states.get(key) if states is not None else None
+        if state is None:
+            state = self._build_light_state(
+                new_action,
+                request.brightness,
+                request.color_temp,
+                request.red,
+                request.green,
+                request.blue,
+                request.hue,
+                request.saturation,
+                *flags,
             )
+            if states is not None:
+                states[key] = state
+
+        # Execute light control; after a failure the light's state is unknown
+        try:
+            result = await client.control_light(light_id, state)
+        except Exception:
+            self._last_on.pop(light_id, None)
+            raise
+        self._remember_on((light_id,), new_action is Action.ON)
+
+        # Runs once per light in a room fan-out; skip the call when filtered
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Successfully controlled light %s: %s", light_id, action)
+
+        return HueResponse(
+            success=True,
+            message=f"Light {light_id} {action} successfully",
+            data=result,
+            lights_affected=[light_id],
+        )
 
     async def control_room(self, request: RoomControlRequest) -> HueResponse:
+        """Control all lights in a room concurrently.
+
+        Identical on/off commands already in flight are shared rather than sent
+        to the bridge again. Toggle is not idempotent, so it always runs.
+        """
+        if request.action is Action.TOGGLE:
+            return await self._control_room(request)
+
+        # Requests are frozen, so equal commands hash alike and key directly
+        task = self._pending_rooms.get(request)
+        if task is None:
+            task = asyncio.ensure_future(self._control_room(request))
+            self._pending_rooms[request] = task
+            task.add_done_callback(lambda _: self._pending_rooms.pop(request, None))
+        # Shielded so one caller giving up doesn't cancel the others' command
+        return await asyncio.shield(task)
+
+    @_error_response
+    async def _control_room(self, request: RoomControlRequest) -> HueResponse:
         """Control all lights in a room concurrently."""
+        self._validate_room(request.room)
+
+        if request.room == "all":
+            # Use group 0 for all lights (more efficient)
+            return await self._control_all_lights_group(request)
+
+        light_ids = _ROOM_LIGHTS[request.room]
+
+        client = self._get_client()
+        # One group action on the bridge when the room maps onto a group
+        group_response = await self._control_room_group(client, request, light_ids)
+        if group_response is not None:
+            return group_response
+
+        # Otherwise count the per-light stream as results arrive; only the
+        # failed IDs are reported (each error is logged as it happens)
+        failed_ids: List[int] = []
+        success_count = 0
+        async for result in self._stream_light_results(client, request, light_ids):
+            if result.success:
+                success_count += 1
+            else:
+                failed_ids.append(result.light_id)
+        failed_ids.sort(key=light_ids.index)
+        total_count = len(light_ids)
+        failed_count = total_count - success_count
+
+        logger.info(
+            "Room control completed: %s/%s lights successful",
+            success_count,
+            total_count,
+        )
+
+        return HueResponse(
+            success=failed_count == 0,
+            message=f"Controlled {success_count}/{total_count} lights in {request.room}",
+            lights_affected=list(light_ids),
+            data=_room_data(success_count, failed_ids),
+        )
+
+    async def _stream_light_results(
+        self,
+        client: AsyncHueClient,
+        request: RoomControlRequest,
+        light_ids: Tuple[int, ...],
+    ) -> AsyncIterator[LightResult]:
+        """Run per-light commands on a small worker pool, yielding as they finish."""
+        pending: asyncio.Queue = asyncio.Queue()
+        for light_id in light_ids:
+            pending.put_nowait(light_id)
+        finished: asyncio.Queue = asyncio.Queue()
+        states: Dict[Tuple[Action, bool, bool], Dict[str, Any]] = {}
+
+        # Bound once so the worker loop does no attribute lookups per light
+        control = self._control_room_light
+        is_empty = pending.empty
+        take = pending.get_nowait
+        put = finished.put_nowait
+
+        async def worker():
+            while not is_empty():
+                put(await control(client, request, take(), states))
+
+        worker_count = min(MAX_CONCURRENT_LIGHTS, len(light_ids))
+        workers = [asyncio.create_task(worker()) for _ in range(worker_count)]
         try:
-            self._validate_room(request.room)
-
-            if request.room == "all":
-                # Use group 0 for all lights (more efficient)
-                return await self._control_all_lights_group(request)
-
-            light_ids = self.room_mappings[request.room]
-
-            # Control lights concurrently with semaphore to limit concurrent operations
-            semaphore = asyncio.Semaphore(5)
-
-            async def control_single_light(light_id: int):
-                async with semaphore:
-                    try:
-                        light_request = LightControlRequest(
-                            light_id=light_id,
-                            action=request.action,
-                            brightness=request.brightness,
-                            color_temp=request.color_temp,
-                            red=request.red,
-                            green=request.green,
-                            blue=request.blue,
-                            hue=request.hue,
-                            saturation=request.saturation,
-                        )
-                        result = await self.control_light(light_request)
-                        return {
-                            "light_id": light_id,
-                            "result": result,
-                            "success": result.success,
-                        }
-                    except Exception as e:
-                        logger.error(f"Failed to control light {light_id}: {e}")
-                        return {"light_id": light_id, "error": str(e), "success": False}
-
-            # Execute all operations concurrently
-            tasks = [control_single_light(light_id) for light_id in light_ids]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Process results
-            successful = [
-                r for r in results if isinstance(r, dict) and r.get("success", False)
-            ]
-            failed = [
-                r
-                for r in results
-                if isinstance(r, dict) and not r.get("success", False)
-            ]
-
-            success_count = len(successful)
-            total_count = len(light_ids)
-
-            logger.info(
-                f"Room control completed: {success_count}/{total_count} lights successful"
-            )
+            for _ in light_ids:
+                yield await finished.get()
+        finally:
+            # The consumer may stop early; don't leave commands running
+            for task in workers:
+                task.cancel()
+
+    async def _control_room_light(
+        self,
+        client: AsyncHueClient,
+        request: RoomControlRequest,
+        light_id: int,
+        states: Dict[Tuple[Action, bool, bool], Dict[str, Any]],
+    ) -> LightResult:
+        """Control one light of a room, limited by the adaptive slot counter."""
+        await self._acquire_slot()
+        throttled = False
+        try:
+            # Room light IDs come from the mapping and the room request carries
+            # the same validated fields, so no per-light request model is built
+            result = await self._do_control_light(client, light_id, request, states)
+            return LightResult(light_id, result.success, result=result)
+        except Exception as e:
+            throttled = isinstance(e, (HueRateLimitError, HueTimeoutError))
+            logger.error("Failed to control light %s: %s", light_id, e)
+            return LightResult(light_id, False, error=str(e))
+        finally:
+            await self._release_slot(throttled)
 
-            return HueResponse(
-                success=len(failed) == 0,
-                message=f"Controlled {success_count}/{total_count} lights in {request.room}",
-                lights_affected=light_ids,
-                data={
-                    "successful_operations": success_count,
-                    "failed_operations": len(failed),
-                    "details": results,
-                },
+    async def _control_room_group(
+        self,
+        client: AsyncHueClient,
+        request: RoomControlRequest,
+        light_ids: Tuple[int, ...],
+    ) -> Optional[HueResponse]:
+        """Control a room with a single group action if the bridge allows it.
+
+        Returns None when per-light control is needed instead: no bridge group
+        matches the room, or (for "on") its lights differ in color capability.
+        Toggle follows the group's any_on flag, like the all-lights group.
+        A group that has vanished from the bridge is looked up once more, and
+        a group action the bridge rejects falls back to per-light control.
+        Transport failures are raised: per-light commands would fail as well.
+        """
+        try:
+            group_id = await client.find_group_id(light_ids)
+            if group_id is None:
+                return None
+            try:
+                return await self._control_group_for_room(
+                    client, request, light_ids, group_id
+                )
+            except HueNotAvailableError:
+                # The client dropped its stale group index; resolve the room again
+                group_id = await client.find_group_id(light_ids)
+                if group_id is None:
+                    return None
+                return await self._control_group_for_room(
+                    client, request, light_ids, group_id
+                )
+        except (HueConnectionError, HueTimeoutError, HueRateLimitError):
+            raise
+        except HueError as e:
+            logger.warning(
+                "Group action for room %s failed, controlling lights individually: %s",
+                request.room,
+                e,
             )
+            return None
 
-        except Exception as e:
-            logger.error(f"Failed to control room {request.room}: {e}")
-            return HueResponse(
-                success=False, message=str(e), data={"error_type": type(e).__name__}
+    async def _control_group_for_room(
+        self,
+        client: AsyncHueClient,
+        request: RoomControlRequest,
+        light_ids: Tuple[int, ...],
+        group_id: int,
+    ) -> Optional[HueResponse]:
+        """Send a room request to the bridge group holding exactly its lights."""
+        action = request.action
+        if action is Action.TOGGLE:
+            group = await client.get_group(group_id)
+            any_on = group.get("state", {}).get("any_on", False)
+            action = Action.OFF if any_on else Action.ON
+
+        if action is Action.OFF:
+            state = self._build_light_state(Action.OFF)
+        else:
+            room_mask = 0
+            for light_id in light_ids:
+                room_mask |= 1 << light_id
+            # Primed capabilities usually cover the room; list lights otherwise
+            if not self._known_lights(room_mask):
+                self._remember_lights(await client.get_lights())
+                if self.known_mask & room_mask != room_mask:
+                    return None
+            # The room is uniform when its bits are all set or all clear
+            if (self.color_mask & room_mask) not in (0, room_mask) or (
+                self.ct_mask & room_mask
+            ) not in (0, room_mask):
+                return None
+            first = light_ids[0]
+            state = self._build_light_state(
+                action,
+                request.brightness,
+                request.color_temp,
+                request.red,
+                request.green,
+                request.blue,
+                request.hue,
+                request.saturation,
+                self._supports_color_id(first),
+                self._supports_color_temp_id(first),
             )
 
+        try:
+            await client.control_group(group_id, state)
+        except Exception:
+            for light_id in light_ids:
+                self._last_on.pop(light_id, None)
+            raise
+        self._remember_on(light_ids, action is Action.ON)
+
+        logger.info(
+            "Controlled room %s via group %s: %s", request.room, group_id, request.action
+        )
+
+        return HueResponse(
+            success=True,
+            message=f"Controlled {len(light_ids)}/{len(light_ids)} lights in {request.room}",
+            lights_affected=list(light_ids),
+            data=_room_data(len(light_ids), []),
+        )
+
+    @_error_response
     async def _control_all_lights_group(
         self, request: RoomControlRequest
     ) -> HueResponse:
         """Control all lights using group 0 (more efficient)."""
-        try:
-            async with AsyncHueClient() as client:
-                # Build action for group control
-                action = {}
-
-                if request.action == "on":
-                    action["on"] = True
-                    if request.brightness is not None:
-                        action["bri"] = request.brightness
-                    
-                    # Handle color settings - priority: RGB > hue/sat > color_temp
-                    if request.red is not None and request.green is not None and request.blue is not None:
-                        x, y = self._rgb_to_xy(request.red, request.green, request.blue)
-                        action["xy"] = [x, y]
-                    elif request.hue is not None and request.saturation is not None:
-                        action["hue"] = request.hue
-                        action["sat"] = request.saturation
-                    elif request.color_temp is not None:
-                        action["ct"] = request.color_temp
-                elif request.action == "off":
-                    action["on"] = False
-                elif request.action == "toggle":
-                    # For toggle, we'll turn off all lights for simplicity
-                    # In a more advanced implementation, we could check each light's state
-                    action["on"] = False
-
-                result = await client.control_group(0, action)
-
-                logger.info(f"Successfully controlled all lights: {request.action}")
-
-                return HueResponse(
-                    success=True,
-                    message=f"All lights {request.action} successfully",
-                    data=result,
-                    lights_affected=list(range(1, 18)),  # All possible light IDs
-                )
-
-        except Exception as e:
-            logger.error(f"Failed to control all lights: {e}")
-            return HueResponse(
-                success=False, message=str(e), data={"error_type": type(e).__name__}
+        client = self._get_client()
+        if request.action is Action.TOGGLE:
+            # One GET of group 0 says whether any light is on: if so turn
+            # everything off, otherwise turn everything on
+            group = await client.get_group(0)
+            action = {"on": not group.get("state", {}).get("any_on", False)}
+        else:
+            # Group 0 spans lights of every kind, so send any color given
+            action = self._build_light_state(
+                request.action,
+                request.brightness,
+                request.color_temp,
+                request.red,
+                request.green,
+                request.blue,
+                request.hue,
+                request.saturation,
+                supports_color=True,
+                supports_ct=True,
             )
 
+        try:
+            await client.control_group(0, action)
+        except Exception:
+            self._last_on.clear()
+            raise
+        self._remember_on(self._all_ids, action["on"])
+
+        logger.info("Successfully controlled all lights: %s", request.action)
+
+        return HueResponse(
+            success=True,
+            message=f"All lights {request.action} successfully",
+            data=_room_data(len(self._all_ids), []),
+            lights_affected=list(self._all_ids),
+        )
+
+    @_error_response
     async def get_light_status(self, light_id: int) -> HueResponse:
         """Get status of a specific light."""
-        try:
-            self._validate_light_id(light_id)
+        self._validate_light_id(light_id)
 
-            async with AsyncHueClient() as client:
-                state = await client.get_light_state(light_id)
+        client = self._get_client()
+        state = await client.get_light_state(light_id)
+        self._remember_on((light_id,), state.get("state", {}).get("on", False))
 
-                return HueResponse(
-                    success=True,
-                    message=f"Retrieved status for light {light_id}",
-                    data=state,
-                )
-
-        except Exception as e:
-            logger.error(f"Failed to get light {light_id} status: {e}")
-            return HueResponse(
-                success=False, message=str(e), data={"error_type": type(e).__name__}
-            )
+        return HueResponse(
+            success=True,
+            message=f"Retrieved status for light {light_id}",
+            data=state,
+        )
 
+    @_error_response
     async def list_all_lights(self) -> HueResponse:
         """List all lights and their states."""
-        try:
-            async with AsyncHueClient() as client:
-                lights = await client.get_lights()
+        client = self._get_client()
+        lights = await client.get_lights()
+        self._remember_lights(lights)
+        for light_id, info in lights.items():
+            self._remember_on((int(light_id),), info.get("state", {}).get("on", False))
 
-                return HueResponse(
-                    success=True, message=f"Retrieved {len(lights)} lights", data=lights
-                )
-
-        except Exception as e:
-            logger.error(f"Failed to list lights: {e}")
-            return HueResponse(
-                success=False, message=str(e), data={"error_type": type(e).__name__}
-            )
+        return HueResponse(
+            success=True, message=f"Retrieved {len(lights)} lights", data=lights
+        )
 
+    @_error_response
     async def discover_bridge(self) -> HueResponse:
         """Test bridge connectivity and get bridge info."""
-        try:
-            async with AsyncHueClient() as client:
-                config_data = await client.get_config()
-
-                bridge_info = {
-                    "name": config_data.get("name", "Unknown"),
-                    "swversion": config_data.get("swversion", "Unknown"),
-                    "apiversion": config_data.get("apiversion", "Unknown"),
-                    "mac": config_data.get("mac", "Unknown"),
-                    "bridge_id": config_data.get("bridgeid", "Unknown"),
-                    "model_id": config_data.get("modelid", "Unknown"),
-                }
-
-                return HueResponse(
-                    success=True,
-                    message="Bridge connection successful",
-                    data=bridge_info,
-                )
-
-        except Exception as e:
-            logger.error(f"Failed to discover bridge: {e}")
-            return HueResponse(
-                success=False, message=str(e), data={"error_type": type(e).__name__}
-            )
+        client = self._get_client()
+        config_data = await client.get_config()
+
+        bridge_info = {
+            "name": config_data.get("name", "Unknown"),
+            "swversion": config_data.get("swversion", "Unknown"),
+            "apiversion": config_data.get("apiversion", "Unknown"),
+            "mac": config_data.get("mac", "Unknown"),
+            "bridge_id": config_data.get("bridgeid", "Unknown"),
+            "model_id": config_data.get("modelid", "Unknown"),
+        }
+
+        return HueResponse(
+            success=True,
+            message="Bridge connection successful",
+            data=bridge_info,
+        )
+
+
+# Process-wide manager shared by the MCP tools, so its client's connection pool
+# and capability cache outlive a single tool call
+_MANAGER: Optional[LightManager] = None
+
+
+def get_manager() -> LightManager:
+    """Return the shared LightManager, creating it on first use."""
+    global _MANAGER
+    if _MANAGER is None:
+        _MANAGER = LightManager()
+    return _MANAGER
@@ -1,17 +1,11 @@
 """Main MCP server for Philips Hue control."""
 
+import asyncio
 import logging
 import signal
 import sys
 
 from .config import config
-from .hue_client import AsyncHueClient
-
-# Import the shared MCP instance
-from .mcp_instance import mcp
-
-# Import tool modules to register them with FastMCP
-from .tools import discovery, light_control, room_control
 
 # Configure logging
 logging.basicConfig(
@@ -22,22 +16,56 @@ logger = logging.getLogger(__name__)
 
 
 async def test_bridge_connection():
-    """Test connection to Hue bridge during startup."""
+    """Test connection to Hue bridge during startup.
+
+    Runs in the serving event loop (from _serve), so the shared manager's
+    client and its pooled connection carry over to tool calls.
+    """
+    from .light_manager import get_manager
+
+    manager = get_manager()
     try:
-        async with AsyncHueClient() as client:
-            success = await client.test_connection()
-            if success:
-                logger.info(
-                    f"Successfully connected to Hue bridge at {config.bridge_ip}"
-                )
-            else:
-                logger.warning(f"Failed to connect to Hue bridge at {config.bridge_ip}")
-                logger.warning("Server will start but tools may not work properly")
+        response = await manager.discover_bridge()
+        if response.success:
+            logger.info(f"Successfully connected to Hue bridge at {config.bridge_ip}")
+            # Light capabilities don't change while running; learn them once
+            await manager.prime_capabilities()
+        else:
+            logger.warning(f"Failed to connect to Hue bridge at {config.bridge_ip}")
+            logger.warning("Server will start but tools may not work properly")
     except Exception as e:
         logger.error(f"Error testing bridge connection: {e}")
         logger.warning("Server will start but tools may not work properly")
 
 
+def _register_tools():
+    """Import the tool modules, registering them with the shared MCP instance.
+
+    FastMCP is by far the slowest import, so it is deferred to main() rather
+    than paid when this module is imported.
+    """
+    from .mcp_instance import mcp
+    from .tools import discovery, light_control, room_control  # noqa: F401
+
+    return mcp
+
+
+async def _serve(mcp):
+    """Check the bridge, serve until shutdown, then release its connections.
+
+    This wraps the whole server rather than using a FastMCP lifespan, which
+    some FastMCP 2.x versions enter once per streamable-http session.
+    """
+    from .light_manager import get_manager
+
+    await test_bridge_connection()
+    try:
+        # Run the server with streamable-http transport
+        await mcp.run_async(transport="streamable-http", host="0.0.0.0")
+    finally:
+        await get_manager().aclose()
+
+
 def setup_signal_handlers():
     """Setup signal handlers for graceful shutdown."""
 
@@ -58,13 +86,10 @@ def main():
         logger.info(f"Bridge IP: {config.bridge_ip}")
         logger.info(f"Log level: {config.log_level}")
 
-        # Test bridge connection before starting server
-        import asyncio
+        mcp = _register_tools()
 
-        asyncio.run(test_bridge_connection())
-
-        # Run the server with streamable-http transport
-        mcp.run(transport="streamable-http", host="0.0.0.0")
+        # One event loop for the bridge check, the server and the shutdown
+        asyncio.run(_serve(mcp))
 
     except KeyboardInterrupt:
         logger.info("Received keyboard interrupt, shutting down...")
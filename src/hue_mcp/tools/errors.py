@@ -0,0 +1,55 @@
+"""Shared error handling for MCP tool handlers."""
+
+import functools
+import logging
+from typing import Awaitable, Callable
+
+from pydantic import ValidationError
+
+from ..hue_client import HueError
+from ..light_manager import UNEXPECTED_ERROR_JSON, HueResponse
+
+
+def mcp_error_boundary(
+    fn: Callable[..., Awaitable[str]],
+) -> Callable[..., Awaitable[str]]:
+    """
+    Turn exceptions raised by a tool handler into JSON error responses.
+
+    functools.wraps keeps the handler's signature and annotations, so
+    FastMCP still derives the tool's argument schema from the original
+    function. Unexpected errors are logged with a traceback under the
+    handler's own module logger.
+    """
+    logger = logging.getLogger(fn.__module__)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs) -> str:
+        try:
+            return await fn(*args, **kwargs)
+
+        except ValidationError as e:
+            error_response = HueResponse(
+                success=False,
+                message=f"Invalid parameters: {e}",
+                data={"validation_errors": e.errors()},
+            )
+            return error_response.to_json()
+
+        except ValueError as e:
+            error_response = HueResponse(
+                success=False, message=str(e), data={"error_type": "ValidationError"}
+            )
+            return error_response.to_json()
+
+        except HueError as e:
+            error_response = HueResponse(
+                success=False, message=str(e), data={"error_type": type(e).__name__}
+            )
+            return error_response.to_json()
+
+        except Exception:
+            logger.exception("Unexpected error in %s", fn.__name__)
+            return UNEXPECTED_ERROR_JSON
+
+    return wrapper
@@ -3,18 +3,21 @@
 import logging
 from typing import Optional
 
-from pydantic import ValidationError
-
-from ..hue_client import HueError
-from ..light_manager import HueResponse, LightControlRequest, LightManager
+from ..light_manager import LightControlRequest, get_manager
 
 # Import the shared MCP instance
 from ..mcp_instance import mcp
+from .errors import mcp_error_boundary
 
 logger = logging.getLogger(__name__)
 
+# Light IDs the bridge addresses; range membership is a single O(1) test
+_VALID_LIGHT_IDS = range(1, 18)
+_LIGHT_ID_RANGE_MESSAGE = "Light ID must be an integer between 1 and 17, got {}"
+
 
 @mcp.tool()
+@mcp_error_boundary
 async def hue_control_light(
     light_id: int,
     action: str,
@@ -48,53 +51,30 @@ async def hue_control_light(
         RGB requires all three components (red, green, blue)
         HSB requires both hue and saturation
     """
-    try:
-        # Input validation with Pydantic
-        request = LightControlRequest(
-            light_id=light_id,
-            action=action,
-            brightness=brightness,
-            color_temp=color_temp,
-            red=red,
-            green=green,
-            blue=blue,
-            hue=hue,
-            saturation=saturation,
-        )
-
-        # Business logic delegation to manager
-        manager = LightManager()
-        result = await manager.control_light(request)
-
-        logger.info(f"Light control tool executed: light {light_id} {action}")
-
-        return result.model_dump_json()
-
-    except ValidationError as e:
-        error_response = HueResponse(
-            success=False,
-            message=f"Invalid parameters: {e}",
-            data={"validation_errors": e.errors()},
-        )
-        return error_response.model_dump_json()
-
-    except HueError as e:
-        error_response = HueResponse(
-            success=False, message=str(e), data={"error_type": type(e).__name__}
-        )
-        return error_response.model_dump_json()
-
-    except Exception as e:
-        logger.error(f"Unexpected error in hue_control_light: {e}")
-        error_response = HueResponse(
-            success=False,
-            message="An unexpected error occurred",
-            data={"error_type": "UnexpectedError"},
-        )
-        return error_response.model_dump_json()
+    # Input validation with Pydantic
+    request = LightControlRequest(
+        light_id=light_id,
+        action=action,
+        brightness=brightness,
+        color_temp=color_temp,
+        red=red,
+        green=green,
+        blue=blue,
+        hue=hue,
+        saturation=saturation,
+    )
+
+    # Business logic delegation to manager
+    manager = get_manager()
+    result = await manager.control_light(request)
+
+    logger.info("Light control tool executed: light %s %s", light_id, action)
+
+    return result.to_json()
 
 
 @mcp.tool()
+@mcp_error_boundary
 async def hue_get_light_state(light_id: int) -> str:
     """
     Get the current state of a specific Hue light.
@@ -105,38 +85,15 @@ async def hue_get_light_state(light_id: int) -> str:
     Returns:
         JSON string with light state information
     """
-    try:
-        # Validate light ID
-        if not isinstance(light_id, int) or light_id < 1 or light_id > 17:
-            raise ValueError(
-                f"Light ID must be an integer between 1 and 17, got {light_id}"
-            )
-
-        # Business logic delegation to manager
-        manager = LightManager()
-        result = await manager.get_light_status(light_id)
-
-        logger.info(f"Light state query executed: light {light_id}")
-
-        return result.model_dump_json()
-
-    except ValueError as e:
-        error_response = HueResponse(
-            success=False, message=str(e), data={"error_type": "ValidationError"}
-        )
-        return error_response.model_dump_json()
-
-    except HueError as e:
-        error_response = HueResponse(
-            success=False, message=str(e), data={"error_type": type(e).__name__}
-        )
-        return error_response.model_dump_json()
-
-    except Exception as e:
-        logger.error(f"Unexpected error in hue_get_light_state: {e}")
-        error_response = HueResponse(
-            success=False,
-            message="An unexpected error occurred",
-            data={"error_type": "UnexpectedError"},
-        )
-        return error_response.model_dump_json()
+    # Validate light ID; the type check comes first since 5.0 in range(...)
+    # is True and floats must not reach the manager
+    if not isinstance(light_id, int) or light_id not in _VALID_LIGHT_IDS:
+        raise ValueError(_LIGHT_ID_RANGE_MESSAGE.format(light_id))
+
+    # Business logic delegation to manager
+    manager = get_manager()
+    result = await manager.get_light_status(light_id)
+
+    logger.info("Light state query executed: light %s", light_id)
+
+    return result.to_json()
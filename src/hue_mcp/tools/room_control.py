@@ -3,19 +3,17 @@
 import logging
 from typing import Optional
 
-from pydantic import ValidationError
-
-from ..config import ROOM_MAPPINGS
-from ..hue_client import HueError
-from ..light_manager import HueResponse, LightManager, RoomControlRequest
+from ..light_manager import RoomControlRequest, get_manager
 
 # Import the shared MCP instance
 from ..mcp_instance import mcp
+from .errors import mcp_error_boundary
 
 logger = logging.getLogger(__name__)
 
 
 @mcp.tool()
+@mcp_error_boundary
 async def hue_control_room(
     room: str,
     action: str,
@@ -49,63 +47,26 @@ async def hue_control_room(
         RGB requires all three components (red, green, blue)
         HSB requires both hue and saturation
     """
-    try:
-        # Validate room name
-        if room not in ROOM_MAPPINGS:
-            available_rooms = list(ROOM_MAPPINGS.keys())
-            raise ValueError(
-                f"Unknown room '{room}'. Available rooms: {available_rooms}"
-            )
-
-        # Input validation with Pydantic
-        request = RoomControlRequest(
-            room=room, 
-            action=action, 
-            brightness=brightness, 
-            color_temp=color_temp,
-            red=red,
-            green=green,
-            blue=blue,
-            hue=hue,
-            saturation=saturation,
-        )
-
-        # Business logic delegation to manager
-        manager = LightManager()
-        result = await manager.control_room(request)
-
-        lights_count = len(ROOM_MAPPINGS[room]) if room != "all" else "all"
-        logger.info(
-            f"Room control tool executed: {room} ({lights_count} lights) {action}"
-        )
-
-        return result.model_dump_json()
-
-    except ValueError as e:
-        error_response = HueResponse(
-            success=False, message=str(e), data={"error_type": "ValidationError"}
-        )
-        return error_response.model_dump_json()
-
-    except ValidationError as e:
-        error_response = HueResponse(
-            success=False,
-            message=f"Invalid parameters: {e}",
-            data={"validation_errors": e.errors()},
-        )
-        return error_response.model_dump_json()
-
-    except HueError as e:
-        error_response = HueResponse(
-            success=False, message=str(e), data={"error_type": type(e).__name__}
-        )
-        return error_response.model_dump_json()
-
-    except Exception as e:
-        logger.error(f"Unexpected error in hue_control_room: {e}")
-        error_response = HueResponse(
-            success=False,
-            message="An unexpected error occurred",
-            data={"error_type": "UnexpectedError"},
-        )
-        return error_response.model_dump_json()
+    # Input validation with Pydantic; the manager checks the room name
+    request = RoomControlRequest(
+        room=room, 
+        action=action, 
+        brightness=brightness, 
+        color_temp=color_temp,
+        red=red,
+        green=green,
+        blue=blue,
+        hue=hue,
+        saturation=saturation,
+    )
+
+    # Business logic delegation to manager
+    manager = get_manager()
+    result = await manager.control_room(request)
+
+    lights_count = len(result.lights_affected or ())
+    logger.info(
+        "Room control tool executed: %s (%d lights) %s", room, lights_count, action
+    )
+
+    return result.to_json()
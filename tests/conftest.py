@@ -1,5 +1,6 @@
 """Pytest configuration and fixtures for Hue MCP server tests."""
 
+import json
 import pytest
 import pytest_asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -61,7 +62,7 @@ def mock_httpx_response():
     """Mock httpx.Response object."""
     response = MagicMock()
     response.status_code = 200
-    response.json.return_value = [{"success": {"/lights/1/state/on": True}}]
+    response.content = json.dumps([{"success": {"/lights/1/state/on": True}}]).encode()
     response.raise_for_status.return_value = None
     return response
 
@@ -76,12 +77,34 @@ async def mock_async_client(mock_httpx_response):
     return client
 
 
+@pytest.fixture
+def httpx_response():
+    """Factory for mock httpx.Response objects."""
+    def make(payload=None, status_code=200, headers=None):
+        response = MagicMock()
+        response.status_code = status_code
+        response.headers = headers if headers is not None else {}
+        if payload is not None:
+            response.content = json.dumps(payload).encode()
+        response.raise_for_status.return_value = None
+        return response
+    return make
+
+
+@pytest.fixture
+def patched_httpx_client():
+    """Patch httpx.AsyncClient in hue_client and yield the pooled client mock."""
+    with patch('hue_mcp.hue_client.httpx.AsyncClient') as mock_client_class:
+        client = AsyncMock()
+        mock_client_class.return_value = client
+        yield client
+
+
 @pytest.fixture
 def mock_hue_client(mock_async_client):
     """Mock HueClient with mocked HTTP client."""
     with patch('hue_mcp.hue_client.httpx.AsyncClient') as mock_client_class:
-        mock_client_class.return_value.__aenter__.return_value = mock_async_client
-        mock_client_class.return_value.__aexit__.return_value = None
+        mock_client_class.return_value = mock_async_client
         yield mock_client_class
 
 
@@ -120,9 +143,9 @@ def mock_rate_limiter():
 @pytest.fixture
 def mock_light_manager():
     """Mock LightManager for testing tools."""
-    with patch('hue_mcp.tools.light_control.LightManager') as mock_manager:
+    with patch('hue_mcp.tools.light_control.get_manager') as mock_get_manager:
         manager_instance = AsyncMock()
-        mock_manager.return_value = manager_instance
+        mock_get_manager.return_value = manager_instance
         yield manager_instance
 
 
@@ -137,6 +160,7 @@ def mock_config():
         mock_cfg.timeout_read = 10.0
         mock_cfg.max_connections = 10
         mock_cfg.max_keepalive_connections = 5
+        mock_cfg.keepalive_expiry = 60.0
         mock_cfg.light_rate_limit = 10
         mock_cfg.group_rate_limit = 1.0
         mock_cfg.log_level = "INFO"
@@ -1,8 +1,11 @@
 """Unit tests for AsyncHueClient."""
 
+import asyncio
+import gc
+import time
 import pytest
 import pytest_asyncio
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, patch
 import httpx
 
 from hue_mcp.hue_client import (
@@ -11,6 +14,8 @@ from hue_mcp.hue_client import (
     HueConnectionError, 
     HueTimeoutError, 
     HueValidationError,
+    HueRateLimitError,
+    HueNotAvailableError,
     HueRateLimiter
 )
 
@@ -29,9 +34,19 @@ class TestHueRateLimiter:
         await rate_limiter.acquire_light_token()
         await rate_limiter.acquire_light_token()
     
+    async def test_light_token_spacing_after_burst(self, rate_limiter):
+        """Test that light tokens are spaced out once the burst is used."""
+        start_time = time.monotonic()
+        
+        # A full burst plus two more callers, all arriving at once
+        await asyncio.gather(*[rate_limiter.acquire_light_token() for _ in range(12)])
+        
+        elapsed = time.monotonic() - start_time
+        # The two callers past the burst wait one and two intervals (0.1s each)
+        assert 0.19 <= elapsed < 0.5
+    
     async def test_group_token_acquisition(self, rate_limiter):
         """Test acquiring group tokens."""
-        import time
         start_time = time.time()
         
         # First call should be immediate
@@ -58,66 +73,150 @@ class TestAsyncHueClient:
         async with hue_client as client:
             assert client._client is not None
         # Client should be closed after exiting context
+        assert hue_client._client is None
     
     @patch('hue_mcp.hue_client.httpx.AsyncClient')
-    async def test_get_lights_success(self, mock_client_class, hue_client, mock_lights_response):
-        """Test successful lights retrieval."""
+    async def test_client_reused_across_requests(self, mock_client_class, hue_client, httpx_response, mock_lights_response):
+        """Test that one pooled HTTP client is shared by successive requests."""
         # Setup mock
         mock_client = AsyncMock()
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = mock_lights_response
-        mock_response.raise_for_status.return_value = None
-        mock_client.get.return_value = mock_response
+        mock_client.get.return_value = httpx_response(mock_lights_response)
         
-        mock_client_class.return_value.__aenter__.return_value = mock_client
-        mock_client_class.return_value.__aexit__.return_value = None
+        mock_client_class.return_value = mock_client
+        
+        # Test
+        await hue_client.get_light_state(1)
+        await hue_client.get_light_state(2)
+        await hue_client.close()
+        
+        # Assertions
+        mock_client_class.assert_called_once()
+        assert mock_client.get.call_count == 2
+        mock_client.aclose.assert_awaited_once()
+        assert hue_client._client is None
+    
+    async def test_get_lights_success(self, hue_client, patched_httpx_client, httpx_response, mock_lights_response):
+        """Test successful lights retrieval."""
+        # Setup mock
+        mock_response = httpx_response(mock_lights_response)
+        patched_httpx_client.get.return_value = mock_response
         
         # Test
         result = await hue_client.get_lights()
         
         # Assertions
         assert result == mock_lights_response
-        mock_client.get.assert_called_once()
+        patched_httpx_client.get.assert_called_once()
     
-    @patch('hue_mcp.hue_client.httpx.AsyncClient')
-    async def test_get_light_state_success(self, mock_client_class, hue_client):
+    async def test_responses_closed_after_each_request(self, hue_client):
+        """Test that every response is read and closed, including error ones."""
+        streams = []
+        
+        class TrackedStream(httpx.AsyncByteStream):
+            closed = False
+            
+            async def __aiter__(self):
+                yield b'{"name": "Test Bridge"}'
+            
+            async def aclose(self):
+                self.closed = True
+        
+        def handle(request):
+            # Alternate 200 and 404 responses
+            stream = TrackedStream()
+            streams.append(stream)
+            status = 404 if len(streams) % 2 == 0 else 200
+            return httpx.Response(status, stream=stream)
+        
+        transport = httpx.MockTransport(handle)
+        with patch.object(hue_client, "_build_transport", return_value=transport):
+            try:
+                for _ in range(20):
+                    try:
+                        await hue_client._safe_request("http://bridge/api/config")
+                    except HueValidationError:
+                        pass
+            finally:
+                await hue_client.close()
+        
+        assert len(streams) == 20
+        assert all(stream.closed for stream in streams)
+    
+    async def test_get_lights_cached_until_write(self, hue_client, patched_httpx_client, httpx_response, mock_lights_response, mock_hue_response_success):
+        """Test that lights are cached and a light write invalidates them."""
+        # Setup mock
+        mock_get_response = httpx_response(mock_lights_response)
+        mock_put_response = httpx_response(mock_hue_response_success)
+        patched_httpx_client.get.return_value = mock_get_response
+        patched_httpx_client.put.return_value = mock_put_response
+        
+        # Test
+        await hue_client.get_lights()
+        await hue_client.get_lights()
+        assert patched_httpx_client.get.call_count == 1
+        
+        await hue_client.control_light(1, {"on": True})
+        await hue_client.get_lights()
+        
+        # Assertions
+        assert patched_httpx_client.get.call_count == 2
+    
+    async def test_concurrent_get_lights_share_one_request(self, hue_client, patched_httpx_client, httpx_response, mock_lights_response):
+        """Test that simultaneous cache misses reach the bridge once."""
+        # Setup mock
+        mock_response = httpx_response(mock_lights_response)
+        patched_httpx_client.get.return_value = mock_response
+        
+        # Test
+        first, second = await asyncio.gather(
+            hue_client.get_lights(), hue_client.get_lights()
+        )
+        
+        # Assertions
+        assert first == second == mock_lights_response
+        assert patched_httpx_client.get.call_count == 1
+        assert hue_client._pending_gets == {}
+    
+    async def test_get_light_state_cached_until_write(self, hue_client, patched_httpx_client, httpx_response, mock_hue_response_success):
+        """Test that a light's state is reused briefly and dropped on write."""
+        # Setup mock
+        mock_get_response = httpx_response({"state": {"on": True}})
+        mock_put_response = httpx_response(mock_hue_response_success)
+        patched_httpx_client.get.return_value = mock_get_response
+        patched_httpx_client.put.return_value = mock_put_response
+        
+        # Test
+        await hue_client.get_light_state(3)
+        await hue_client.get_light_state(3)
+        assert patched_httpx_client.get.call_count == 1
+        
+        await hue_client.control_light(3, {"on": False})
+        await hue_client.get_light_state(3)
+        
+        # Assertions
+        assert patched_httpx_client.get.call_count == 2
+    
+    async def test_get_light_state_success(self, hue_client, patched_httpx_client, httpx_response):
         """Test successful light state retrieval."""
         # Setup mock
-        mock_client = AsyncMock()
-        mock_response = MagicMock()
-        mock_response.status_code = 200
         light_state = {
             "name": "Test Light",
             "state": {"on": True, "bri": 200, "ct": 366}
         }
-        mock_response.json.return_value = light_state
-        mock_response.raise_for_status.return_value = None
-        mock_client.get.return_value = mock_response
-        
-        mock_client_class.return_value.__aenter__.return_value = mock_client
-        mock_client_class.return_value.__aexit__.return_value = None
+        patched_httpx_client.get.return_value = httpx_response(light_state)
         
         # Test
         result = await hue_client.get_light_state(1)
         
         # Assertions
         assert result == light_state
-        mock_client.get.assert_called_once()
+        patched_httpx_client.get.assert_called_once()
     
-    @patch('hue_mcp.hue_client.httpx.AsyncClient')
-    async def test_control_light_success(self, mock_client_class, hue_client, mock_hue_response_success):
+    async def test_control_light_success(self, hue_client, patched_httpx_client, httpx_response, mock_hue_response_success):
         """Test successful light control."""
         # Setup mock
-        mock_client = AsyncMock()
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = mock_hue_response_success
-        mock_response.raise_for_status.return_value = None
-        mock_client.put.return_value = mock_response
-        
-        mock_client_class.return_value.__aenter__.return_value = mock_client
-        mock_client_class.return_value.__aexit__.return_value = None
+        mock_response = httpx_response(mock_hue_response_success)
+        patched_httpx_client.put.return_value = mock_response
         
         # Test
         state = {"on": True, "bri": 200}
@@ -125,21 +224,13 @@ class TestAsyncHueClient:
         
         # Assertions
         assert result == mock_hue_response_success[0]
-        mock_client.put.assert_called_once()
+        patched_httpx_client.put.assert_called_once()
     
-    @patch('hue_mcp.hue_client.httpx.AsyncClient')
-    async def test_control_group_success(self, mock_client_class, hue_client, mock_hue_response_success):
+    async def test_control_group_success(self, hue_client, patched_httpx_client, httpx_response, mock_hue_response_success):
         """Test successful group control."""
         # Setup mock
-        mock_client = AsyncMock()
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = mock_hue_response_success
-        mock_response.raise_for_status.return_value = None
-        mock_client.put.return_value = mock_response
-        
-        mock_client_class.return_value.__aenter__.return_value = mock_client
-        mock_client_class.return_value.__aexit__.return_value = None
+        mock_response = httpx_response(mock_hue_response_success)
+        patched_httpx_client.put.return_value = mock_response
         
         # Test
         action = {"on": True}
@@ -147,147 +238,204 @@ class TestAsyncHueClient:
         
         # Assertions
         assert result == mock_hue_response_success[0]
-        mock_client.put.assert_called_once()
+        patched_httpx_client.put.assert_called_once()
     
-    @patch('hue_mcp.hue_client.httpx.AsyncClient')
-    async def test_404_error_handling(self, mock_client_class, hue_client):
+    async def test_deleted_group_is_resolved_again(self, hue_client, patched_httpx_client, httpx_response):
+        """Test that a group gone from the bridge drops the cached group index."""
+        # Setup mock: the bridge renumbers the bedroom group from 3 to 5
+        patched_httpx_client.get.side_effect = [
+            httpx_response({"3": {"name": "Bedroom", "lights": ["1", "4"]}}),
+            httpx_response({"5": {"name": "Bedroom", "lights": ["1", "4"]}}),
+        ]
+        patched_httpx_client.put.return_value = httpx_response([{
+            "error": {
+                "type": 3,
+                "address": "/groups/3/action",
+                "description": "resource, /groups/3/action, not available"
+            }
+        }])
+        
+        # Test
+        assert await hue_client.find_group_id([1, 4]) == 3
+        with pytest.raises(HueNotAvailableError):
+            await hue_client.control_group(3, {"on": True})
+        
+        # Assertions
+        assert await hue_client.find_group_id([4, 1]) == 5
+        assert patched_httpx_client.get.call_count == 2
+        
+        # Invalidating the cache forgets the group index too
+        hue_client.invalidate_cache()
+        assert hue_client._group_index is None
+    
+    async def test_control_light_coalesces_queued_writes(self, hue_client):
+        """Test that writes behind an in-flight PUT merge into one more PUT."""
+        sent = []
+        
+        async def slow_request(endpoint, method="GET", data=None, retries=3):
+            sent.append(dict(data))
+            await asyncio.sleep(0.01)
+            return {"success": True}
+        
+        with patch.object(hue_client, "_safe_request", side_effect=slow_request):
+            results = await asyncio.gather(
+                hue_client.control_light(1, {"on": True, "bri": 50}),
+                hue_client.control_light(1, {"bri": 100}),
+                hue_client.control_light(1, {"bri": 150, "ct": 300}),
+            )
+        
+        # Assertions
+        assert results == [{"success": True}] * 3
+        assert sent == [{"on": True, "bri": 50}, {"bri": 150, "ct": 300}]
+        assert hue_client._writing == set()
+        assert hue_client._queued_writes == {}
+    
+    async def test_failed_queued_write_without_waiters(self, hue_client):
+        """Test that a queued write failing after its waiter left isn't reported."""
+        errors = []
+        loop = asyncio.get_running_loop()
+        loop.set_exception_handler(lambda loop, context: errors.append(context))
+        
+        async def slow_request(endpoint, method="GET", data=None, retries=3):
+            await asyncio.sleep(0.01)
+            if data == {"bri": 100}:
+                raise HueError("Hue API error: device is unreachable")
+            return {"success": True}
+        
+        try:
+            with patch.object(hue_client, "_safe_request", side_effect=slow_request):
+                first = asyncio.ensure_future(hue_client.control_light(1, {"bri": 50}))
+                await asyncio.sleep(0)
+                queued = asyncio.ensure_future(
+                    hue_client.control_light(1, {"bri": 100})
+                )
+                await asyncio.sleep(0)
+                queued.cancel()
+                assert await first == {"success": True}
+                while hue_client._write_tasks:
+                    await asyncio.sleep(0.01)
+            # Drop the cancelled waiter so the orphaned future can be collected
+            del queued
+            gc.collect()
+        finally:
+            loop.set_exception_handler(None)
+        
+        # Assertions
+        assert errors == []
+    
+    async def test_404_error_handling(self, hue_client, patched_httpx_client, httpx_response):
         """Test 404 error handling."""
         # Setup mock
-        mock_client = AsyncMock()
-        mock_response = MagicMock()
-        mock_response.status_code = 404
-        mock_client.get.return_value = mock_response
-        
-        mock_client_class.return_value.__aenter__.return_value = mock_client
-        mock_client_class.return_value.__aexit__.return_value = None
+        mock_response = httpx_response(status_code=404)
+        patched_httpx_client.get.return_value = mock_response
         
         # Test
         with pytest.raises(HueValidationError):
             await hue_client.get_lights()
     
-    @patch('hue_mcp.hue_client.httpx.AsyncClient')
-    async def test_401_error_handling(self, mock_client_class, hue_client):
+    async def test_401_error_handling(self, hue_client, patched_httpx_client, httpx_response):
         """Test 401 error handling."""
         # Setup mock
-        mock_client = AsyncMock()
-        mock_response = MagicMock()
-        mock_response.status_code = 401
-        mock_client.get.return_value = mock_response
-        
-        mock_client_class.return_value.__aenter__.return_value = mock_client
-        mock_client_class.return_value.__aexit__.return_value = None
+        mock_response = httpx_response(status_code=401)
+        patched_httpx_client.get.return_value = mock_response
         
         # Test
         with pytest.raises(HueConnectionError):
             await hue_client.get_lights()
     
-    @patch('hue_mcp.hue_client.httpx.AsyncClient')
-    async def test_hue_api_error_handling(self, mock_client_class, hue_client, mock_hue_response_error):
+    async def test_hue_api_error_handling(self, hue_client, patched_httpx_client, httpx_response, mock_hue_response_error):
         """Test Hue API error response handling."""
         # Setup mock
-        mock_client = AsyncMock()
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = mock_hue_response_error
-        mock_response.raise_for_status.return_value = None
-        mock_client.get.return_value = mock_response
-        
-        mock_client_class.return_value.__aenter__.return_value = mock_client
-        mock_client_class.return_value.__aexit__.return_value = None
+        mock_response = httpx_response(mock_hue_response_error)
+        patched_httpx_client.get.return_value = mock_response
         
         # Test
         with pytest.raises(HueError):
             await hue_client.get_lights()
     
-    @patch('hue_mcp.hue_client.httpx.AsyncClient')
-    async def test_timeout_error_handling(self, mock_client_class, hue_client):
+    async def test_timeout_error_handling(self, hue_client, patched_httpx_client):
         """Test timeout error handling."""
         # Setup mock
-        mock_client = AsyncMock()
-        mock_client.get.side_effect = httpx.TimeoutException("Timeout")
-        
-        mock_client_class.return_value.__aenter__.return_value = mock_client
-        mock_client_class.return_value.__aexit__.return_value = None
+        patched_httpx_client.get.side_effect = httpx.TimeoutException("Timeout")
         
         # Test
         with pytest.raises(HueTimeoutError):
             await hue_client.get_lights()
     
-    @patch('hue_mcp.hue_client.httpx.AsyncClient')
-    async def test_connection_error_handling(self, mock_client_class, hue_client):
-        """Test connection error handling."""
+    async def test_attempt_deadline_handling(self, hue_client, patched_httpx_client):
+        """Test that a request stuck past the per-attempt deadline times out."""
+        
         # Setup mock
-        mock_client = AsyncMock()
-        mock_client.get.side_effect = httpx.RequestError("Connection failed")
+        async def hang(*args, **kwargs):
+            await asyncio.sleep(10)
         
-        mock_client_class.return_value.__aenter__.return_value = mock_client
-        mock_client_class.return_value.__aexit__.return_value = None
+        patched_httpx_client.get.side_effect = hang
+        hue_client._attempt_timeout = 0.01
+        
+        # Test
+        with pytest.raises(HueTimeoutError):
+            await hue_client.get_light_state(1)
+        assert patched_httpx_client.get.call_count == 3
+    
+    async def test_connection_error_handling(self, hue_client, patched_httpx_client):
+        """Test connection error handling."""
+        # Setup mock
+        patched_httpx_client.get.side_effect = httpx.RequestError("Connection failed")
         
         # Test
         with pytest.raises(HueConnectionError):
             await hue_client.get_lights()
     
-    @patch('hue_mcp.hue_client.httpx.AsyncClient')
-    async def test_rate_limit_retry(self, mock_client_class, hue_client):
+    async def test_rate_limit_retry(self, hue_client, patched_httpx_client, httpx_response):
         """Test rate limit retry behavior."""
-        # Setup mock
-        mock_client = AsyncMock()
-        
-        # First call returns 429, second call succeeds
-        mock_response_429 = MagicMock()
-        mock_response_429.status_code = 429
+        # Setup mock: first call returns 429, second call succeeds
+        mock_response_429 = httpx_response(status_code=429)
+        mock_response_200 = httpx_response({"success": True})
         
-        mock_response_200 = MagicMock()
-        mock_response_200.status_code = 200
-        mock_response_200.json.return_value = {"success": True}
-        mock_response_200.raise_for_status.return_value = None
-        
-        mock_client.get.side_effect = [mock_response_429, mock_response_200]
-        
-        mock_client_class.return_value.__aenter__.return_value = mock_client
-        mock_client_class.return_value.__aexit__.return_value = None
+        patched_httpx_client.get.side_effect = [mock_response_429, mock_response_200]
         
         # Test
         result = await hue_client.get_lights()
         
         # Assertions
         assert result == {"success": True}
-        assert mock_client.get.call_count == 2
+        assert patched_httpx_client.get.call_count == 2
     
-    @patch('hue_mcp.hue_client.httpx.AsyncClient')
-    async def test_get_config_success(self, mock_client_class, hue_client, mock_bridge_config):
-        """Test successful bridge config retrieval."""
+    @patch('hue_mcp.hue_client.asyncio.sleep', new_callable=AsyncMock)
+    async def test_rate_limit_honours_retry_after(self, mock_sleep, hue_client, patched_httpx_client, httpx_response):
+        """Test that 429 retries wait for Retry-After plus bounded jitter."""
         # Setup mock
-        mock_client = AsyncMock()
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = mock_bridge_config
-        mock_response.raise_for_status.return_value = None
-        mock_client.get.return_value = mock_response
+        mock_response_429 = httpx_response(status_code=429, headers={"retry-after": "2"})
+        patched_httpx_client.get.return_value = mock_response_429
         
-        mock_client_class.return_value.__aenter__.return_value = mock_client
-        mock_client_class.return_value.__aexit__.return_value = None
+        # Test
+        with pytest.raises(HueRateLimitError):
+            await hue_client.get_light_state(1)
+        
+        # Assertions
+        assert patched_httpx_client.get.call_count == 3
+        delays = [call.args[0] for call in mock_sleep.await_args_list]
+        assert len(delays) == 2
+        assert all(2.0 <= delay <= 2.5 for delay in delays)
+    
+    async def test_get_config_success(self, hue_client, patched_httpx_client, httpx_response, mock_bridge_config):
+        """Test successful bridge config retrieval."""
+        # Setup mock
+        mock_response = httpx_response(mock_bridge_config)
+        patched_httpx_client.get.return_value = mock_response
         
         # Test
         result = await hue_client.get_config()
         
         # Assertions
         assert result == mock_bridge_config
-        mock_client.get.assert_called_once()
+        patched_httpx_client.get.assert_called_once()
     
-    @patch('hue_mcp.hue_client.httpx.AsyncClient')
-    async def test_test_connection_success(self, mock_client_class, hue_client, mock_bridge_config):
+    async def test_test_connection_success(self, hue_client, patched_httpx_client, httpx_response, mock_bridge_config):
         """Test successful connection test."""
         # Setup mock
-        mock_client = AsyncMock()
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = mock_bridge_config
-        mock_response.raise_for_status.return_value = None
-        mock_client.get.return_value = mock_response
-        
-        mock_client_class.return_value.__aenter__.return_value = mock_client
-        mock_client_class.return_value.__aexit__.return_value = None
+        mock_response = httpx_response(mock_bridge_config)
+        patched_httpx_client.get.return_value = mock_response
         
         # Test
         result = await hue_client.test_connection()
@@ -295,15 +443,10 @@ class TestAsyncHueClient:
         # Assertions
         assert result is True
     
-    @patch('hue_mcp.hue_client.httpx.AsyncClient')
-    async def test_test_connection_failure(self, mock_client_class, hue_client):
+    async def test_test_connection_failure(self, hue_client, patched_httpx_client):
         """Test failed connection test."""
         # Setup mock
-        mock_client = AsyncMock()
-        mock_client.get.side_effect = httpx.RequestError("Connection failed")
-        
-        mock_client_class.return_value.__aenter__.return_value = mock_client
-        mock_client_class.return_value.__aexit__.return_value = None
+        patched_httpx_client.get.side_effect = httpx.RequestError("Connection failed")
         
         # Test
         result = await hue_client.test_connection()
@@ -1,12 +1,28 @@
 """Simple functional tests for core functionality without FastMCP decorators."""
 
+import asyncio
+import logging
 import pytest
 import pytest_asyncio
 import json
 from unittest.mock import AsyncMock, patch
 
-from hue_mcp.light_manager import LightManager, LightControlRequest, HueResponse
-from hue_mcp.hue_client import AsyncHueClient, HueError
+from pydantic import ValidationError
+
+from hue_mcp.config import HueConfig
+from hue_mcp.light_manager import (
+    LightManager,
+    LightControlRequest,
+    RoomControlRequest,
+    HueResponse,
+    get_manager,
+)
+from hue_mcp.hue_client import (
+    AsyncHueClient,
+    HueError,
+    HueNotAvailableError,
+    HueTimeoutError,
+)
 
 
 class TestLightManager:
@@ -19,6 +35,11 @@ class TestLightManager:
         assert manager.room_mappings is not None
         assert manager.light_mapping is not None
     
+    async def test_get_manager_is_shared(self):
+        """Test that tools share one LightManager."""
+        assert get_manager() is get_manager()
+        assert isinstance(get_manager(), LightManager)
+    
     async def test_light_control_request_validation(self):
         """Test LightControlRequest validation."""
         # Valid request
@@ -53,7 +74,7 @@ class TestLightManager:
         """Test successful light control."""
         # Setup mock
         mock_client = AsyncMock()
-        mock_client_class.return_value.__aenter__.return_value = mock_client
+        mock_client_class.return_value = mock_client
         
         # Mock the light info that get_light_state returns
         light_info = {
@@ -75,6 +96,507 @@ class TestLightManager:
         assert result.success is True
         assert result.lights_affected == [1]
 
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_control_room_shares_one_client(self, mock_client_class):
+        """Test that room control reuses one client for every light."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.get_light_state.return_value = {
+            "type": "Dimmable light",
+            "state": {"on": False},
+        }
+        mock_client.control_light.return_value = {"success": True}
+        # No bridge group matches, so every light is controlled individually
+        mock_client.find_group_id.return_value = None
+        
+        # Test
+        manager = LightManager()
+        request = RoomControlRequest(room="kitchen", action="off")
+        result = await manager.control_room(request)
+        
+        # Assertions
+        assert result.success is True
+        assert result.lights_affected == [10, 12, 13, 17]
+        mock_client_class.assert_called_once()
+        assert mock_client.control_light.await_count == 4
+
+    async def test_control_room_unknown_room(self, caplog):
+        """Test that an unknown room is a failed response logged as a warning."""
+        # Test
+        manager = LightManager()
+        with caplog.at_level(logging.INFO, logger="hue_mcp.light_manager"):
+            result = await manager.control_room(
+                RoomControlRequest(room="garage", action="on")
+            )
+        
+        # Assertions
+        assert result.success is False
+        assert result.message.startswith("Unknown room 'garage'")
+        assert result.data == {"error_type": "HueValidationError"}
+        assert [record.levelno for record in caplog.records] == [logging.WARNING]
+        assert caplog.records[0].exc_info is None
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_control_room_reports_only_failures(self, mock_client_class):
+        """Test that per-light room results are reduced to counts and failures."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.get_light_state.return_value = {"type": "Dimmable light"}
+        mock_client.find_group_id.return_value = None
+        
+        async def control_light(light_id, state):
+            if light_id == 12:
+                raise HueError("Light 12 unreachable")
+            return {"success": True}
+        
+        mock_client.control_light.side_effect = control_light
+        
+        # Test
+        manager = LightManager()
+        request = RoomControlRequest(room="kitchen", action="off")
+        result = await manager.control_room(request)
+        
+        # Assertions
+        assert result.success is False
+        assert result.data == {
+            "successful_operations": 3,
+            "failed_operations": 1,
+            "failed_light_ids": [12],
+        }
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_control_room_data_shape_matches_across_paths(self, mock_client_class):
+        """Test that group, per-light and all-lights room results share one shape."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.get_light_state.return_value = {"type": "Dimmable light"}
+        mock_client.control_light.return_value = {"success": True}
+        mock_client.control_group.return_value = {"success": True}
+        manager = LightManager()
+        request = RoomControlRequest(room="bedroom", action="off")
+        
+        # Test
+        mock_client.find_group_id.return_value = 3
+        group_result = await manager.control_room(request)
+        mock_client.find_group_id.return_value = None
+        light_result = await manager.control_room(request)
+        all_result = await manager.control_room(
+            RoomControlRequest(room="all", action="off")
+        )
+        
+        # Assertions
+        assert mock_client.control_light.await_count == 2
+        assert group_result.data == light_result.data == {
+            "successful_operations": 2,
+            "failed_operations": 0,
+            "failed_light_ids": [],
+        }
+        assert all_result.data.keys() == group_result.data.keys()
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_control_room_uses_group_action(self, mock_client_class):
+        """Test that on/off for a uniform room becomes one group action."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        color_light = {
+            "type": "Extended color light",
+            "state": {"on": False},
+        }
+        mock_client.get_lights.return_value = {"1": color_light, "4": color_light}
+        mock_client.find_group_id.return_value = 3
+        mock_client.control_group.return_value = {"success": True}
+        
+        # Test
+        manager = LightManager()
+        request = RoomControlRequest(room="bedroom", action="on", brightness=150)
+        result = await manager.control_room(request)
+        
+        # Assertions
+        assert result.success is True
+        assert result.lights_affected == [1, 4]
+        mock_client.control_group.assert_awaited_once_with(
+            3, {"on": True, "bri": 150, "ct": 366}
+        )
+        mock_client.control_light.assert_not_awaited()
+        
+        # Capabilities are now known, so a second command needs no listing
+        await manager.control_room(
+            RoomControlRequest(room="bedroom", action="on", brightness=100)
+        )
+        mock_client.get_lights.assert_awaited_once()
+        assert mock_client.control_group.await_count == 2
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_control_room_resolves_deleted_group_again(self, mock_client_class):
+        """Test that a room whose group vanished is looked up once more."""
+        # Setup mock: group 3 is gone, the room now lives in group 5
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.find_group_id.side_effect = [3, 5]
+        mock_client.control_group.side_effect = [
+            HueNotAvailableError("resource, /groups/3/action, not available"),
+            {"success": True},
+        ]
+        
+        # Test
+        manager = LightManager()
+        result = await manager.control_room(
+            RoomControlRequest(room="bedroom", action="off")
+        )
+        
+        # Assertions
+        assert result.success is True
+        mock_client.control_group.assert_awaited_with(5, {"on": False})
+        assert mock_client.find_group_id.await_count == 2
+        mock_client.control_light.assert_not_awaited()
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_control_room_falls_back_when_group_action_fails(self, mock_client_class):
+        """Test that a rejected group action is retried light by light."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.find_group_id.return_value = 3
+        mock_client.control_group.side_effect = HueError("Hue API error: internal error")
+        mock_client.get_light_state.return_value = {
+            "type": "Dimmable light",
+            "state": {"on": True},
+        }
+        mock_client.control_light.return_value = {"success": True}
+        
+        # Test
+        manager = LightManager()
+        result = await manager.control_room(
+            RoomControlRequest(room="bedroom", action="off")
+        )
+        
+        # Assertions
+        assert result.success is True
+        mock_client.control_group.assert_awaited_once()
+        assert mock_client.control_light.await_count == 2
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_control_room_falls_back_when_group_lookup_fails(
+        self, mock_client_class
+    ):
+        """Test that a rejected group lookup is retried light by light."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.find_group_id.side_effect = HueError("Hue API error: internal error")
+        mock_client.get_light_state.return_value = {
+            "type": "Dimmable light",
+            "state": {"on": True},
+        }
+        mock_client.control_light.return_value = {"success": True}
+        
+        # Test
+        manager = LightManager()
+        result = await manager.control_room(
+            RoomControlRequest(room="bedroom", action="off")
+        )
+        
+        # Assertions
+        assert result.success is True
+        mock_client.control_group.assert_not_awaited()
+        assert mock_client.control_light.await_count == 2
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_control_room_group_transport_error_is_not_retried(self, mock_client_class):
+        """Test that an unreachable bridge doesn't trigger the per-light fallback."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.find_group_id.return_value = 3
+        mock_client.control_group.side_effect = HueTimeoutError("Request timeout")
+        
+        # Test
+        manager = LightManager()
+        result = await manager.control_room(
+            RoomControlRequest(room="bedroom", action="off")
+        )
+        
+        # Assertions
+        assert result.success is False
+        assert result.data == {"error_type": "HueTimeoutError"}
+        mock_client.control_light.assert_not_awaited()
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_control_room_toggle_uses_group_state(self, mock_client_class):
+        """Test that toggling a room is one group action based on any_on."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.find_group_id.return_value = 3
+        mock_client.get_group.return_value = {"state": {"any_on": True}}
+        mock_client.control_group.return_value = {"success": True}
+        
+        # Test
+        manager = LightManager()
+        request = RoomControlRequest(room="bedroom", action="toggle")
+        result = await manager.control_room(request)
+        
+        # Assertions
+        assert result.success is True
+        mock_client.get_group.assert_awaited_once_with(3)
+        mock_client.control_group.assert_awaited_once_with(3, {"on": False})
+        mock_client.control_light.assert_not_awaited()
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_control_light_caches_capabilities(self, mock_client_class):
+        """Test that capabilities and the last written on/off are reused."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.get_light_state.return_value = {
+            "type": "Color temperature light",
+            "state": {"on": True},
+        }
+        mock_client.control_light.return_value = {"success": True}
+        
+        # Test
+        manager = LightManager()
+        await manager.control_light(LightControlRequest(light_id=2, action="on"))
+        await manager.control_light(LightControlRequest(light_id=2, action="on"))
+        assert mock_client.get_light_state.await_count == 1
+        
+        await manager.control_light(LightControlRequest(light_id=2, action="toggle"))
+        
+        # Assertions: toggle flips the state just written, without a GET
+        assert mock_client.get_light_state.await_count == 1
+        mock_client.control_light.assert_awaited_with(2, {"on": False})
+        mock_client_class.assert_called_once()
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_toggle_refetches_after_failed_write(self, mock_client_class):
+        """Test that a failed write forgets the light's on/off state."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.get_light_state.return_value = {
+            "type": "Dimmable light",
+            "state": {"on": True},
+        }
+        mock_client.control_light.side_effect = [
+            {"success": True},
+            HueTimeoutError("Request timed out"),
+            {"success": True},
+        ]
+        
+        # Test
+        manager = LightManager()
+        await manager.control_light(LightControlRequest(light_id=7, action="off"))
+        failed = await manager.control_light(
+            LightControlRequest(light_id=7, action="toggle")
+        )
+        await manager.control_light(LightControlRequest(light_id=7, action="toggle"))
+        
+        # Assertions
+        assert failed.success is False
+        assert mock_client.get_light_state.await_count == 2
+        mock_client.control_light.assert_awaited_with(7, {"on": False})
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_stale_capabilities_are_refetched(self, mock_client_class):
+        """Test that capability flags expire after the TTL."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.get_light_state.return_value = {"type": "Extended color light"}
+        mock_client.control_light.return_value = {"success": True}
+        
+        # Test
+        manager = LightManager()
+        with patch('hue_mcp.light_manager.time.monotonic', return_value=1000.0):
+            await manager.control_light(LightControlRequest(light_id=5, action="on"))
+            await manager.control_light(LightControlRequest(light_id=5, action="on"))
+        with patch('hue_mcp.light_manager.time.monotonic', return_value=1400.0):
+            await manager.control_light(LightControlRequest(light_id=5, action="on"))
+        
+        # Assertions
+        assert mock_client.get_light_state.await_count == 2
+        assert manager.known_mask == manager.color_mask == manager.ct_mask == 1 << 5
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_prime_capabilities_fills_bitmaps(self, mock_client_class):
+        """Test that priming sets one bit per light and capability."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.get_lights.return_value = {
+            "1": {"type": "Extended color light"},
+            "2": {"type": "Color temperature light"},
+            "3": {"type": "Dimmable light"},
+        }
+        
+        # Test
+        manager = LightManager()
+        await manager.prime_capabilities()
+        
+        # Assertions
+        assert manager.known_mask == 0b1110
+        assert manager.color_mask == 0b0010
+        assert manager.ct_mask == 0b0110
+        assert manager._cached_capabilities(2) == (False, True)
+        assert manager._cached_capabilities(4) is None
+        # Group 0 now reports the bridge's lights, not the configured ones
+        assert manager._all_ids == (1, 2, 3)
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_aclose_releases_shared_client(self, mock_client_class):
+        """Test that aclose closes the shared client and a new one follows."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.get_light_state.return_value = {"state": {"on": True}}
+        
+        # Test
+        manager = LightManager()
+        await manager.get_light_status(3)
+        await manager.aclose()
+        await manager.get_light_status(3)
+        
+        # Assertions
+        mock_client.close.assert_awaited_once()
+        assert mock_client_class.call_count == 2
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_control_room_per_light_shares_state(self, mock_client_class):
+        """Test that per-light room control sends one shared state to each light."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.get_light_state.return_value = {
+            "type": "Dimmable light",
+            "state": {"on": True},
+        }
+        mock_client.control_light.return_value = {"success": True}
+        mock_client.find_group_id.return_value = None
+        
+        # Test
+        manager = LightManager()
+        request = RoomControlRequest(room="kitchen", action="toggle")
+        result = await manager.control_room(request)
+        
+        # Assertions
+        assert result.success is True
+        assert result.data == {
+            "successful_operations": 4,
+            "failed_operations": 0,
+            "failed_light_ids": [],
+        }
+        assert mock_client.control_light.await_count == 4
+        # Same action and capabilities, so the state is built only once
+        states = [c.args[1] for c in mock_client.control_light.await_args_list]
+        assert all(state is states[0] for state in states)
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_toggle_all_uses_group_any_on(self, mock_client_class):
+        """Test that toggling all lights follows the bridge's any_on flag."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.get_group.return_value = {"state": {"any_on": False}}
+        mock_client.control_group.return_value = {"success": True}
+        
+        # Test
+        manager = LightManager()
+        request = RoomControlRequest(room="all", action="toggle")
+        result = await manager.control_room(request)
+        
+        # Assertions
+        assert result.success is True
+        mock_client.get_group.assert_awaited_once_with(0)
+        mock_client.control_group.assert_awaited_once_with(0, {"on": True})
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_all_lights_color_precedence(self, mock_client_class):
+        """Test that all lights use the same RGB > hue/sat > color_temp order."""
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        
+        manager = LightManager()
+        request = RoomControlRequest(
+            room="all", action="on", brightness=100, hue=1000, saturation=200
+        )
+        result = await manager.control_room(request)
+        
+        assert result.success is True
+        mock_client.control_group.assert_awaited_once_with(
+            0, {"on": True, "bri": 100, "hue": 1000, "sat": 200}
+        )
+
+    @patch('hue_mcp.light_manager.AsyncHueClient')
+    async def test_concurrent_room_commands_are_shared(self, mock_client_class):
+        """Test that identical in-flight room commands reach the bridge once."""
+        # Setup mock
+        mock_client = AsyncMock()
+        mock_client_class.return_value = mock_client
+        mock_client.find_group_id.return_value = 5
+        mock_client.control_group.return_value = {"success": True}
+        
+        # Test
+        manager = LightManager()
+        first, second = await asyncio.gather(
+            manager.control_room(RoomControlRequest(room="kitchen", action="off")),
+            manager.control_room(RoomControlRequest(room="kitchen", action="off")),
+        )
+        
+        # Assertions
+        assert first.success is True
+        assert second is first
+        mock_client.control_group.assert_awaited_once_with(5, {"on": False})
+        assert manager._pending_rooms == {}
+
+    async def test_response_json_omits_unset_fields(self):
+        """Test that tool payloads leave out fields that are None."""
+        response = HueResponse(success=False, message="Light not found")
+        
+        assert json.loads(response.to_json()) == {
+            "success": False,
+            "message": "Light not found",
+        }
+
+    async def test_rgb_to_xy_matches_srgb_primaries(self):
+        """Test the gamma table conversion against known sRGB chromaticities."""
+        manager = LightManager()
+        
+        x, y = manager._rgb_to_xy(255, 0, 0)
+        assert x == pytest.approx(0.64, abs=1e-3)
+        assert y == pytest.approx(0.33, abs=1e-3)
+        assert manager._rgb_to_xy(0, 0, 0) == (0.0, 0.0)
+
+    async def test_light_slots_adapt_to_throttling(self):
+        """Test that the concurrency limit shrinks on throttling and recovers."""
+        manager = LightManager()
+        
+        await manager._acquire_slot()
+        await manager._release_slot(throttled=True)
+        await manager._acquire_slot()
+        await manager._release_slot(throttled=True)
+        assert manager._max_inflight == 3
+        
+        await manager._acquire_slot()
+        await manager._release_slot()
+        assert manager._max_inflight == 4
+        assert manager._inflight == 0
+
+    def test_light_slots_created_in_running_loop(self):
+        """Test that a manager built outside any loop can be used in one later."""
+        manager = LightManager()
+        assert manager._slots is None
+        
+        async def use_slot():
+            await manager._acquire_slot()
+            await manager._release_slot()
+        
+        asyncio.run(use_slot())
+        assert manager._inflight == 0
+
 
 class TestAsyncHueClientBasic:
     """Basic tests for AsyncHueClient."""
@@ -86,4 +608,63 @@ class TestAsyncHueClientBasic:
         assert client.base_url is not None
         assert client.timeout is not None
         assert client.limits is not None
-        assert client.rate_limiter is not None
\ No newline at end of file
+        assert client.rate_limiter is not None
+    
+    def test_hue_client_created_outside_loop(self):
+        """Test that a client built outside any loop opens its HTTP client in one."""
+        client = AsyncHueClient()
+        
+        async def open_and_close():
+            first = await client._ensure_client()
+            assert await client._ensure_client() is first
+            await client.close()
+        
+        asyncio.run(open_and_close())
+        assert client._client is None
+
+
+class TestHueConfig:
+    """Tests for HueConfig validation."""
+    
+    @pytest.mark.parametrize("bridge_ip", ["192.168.1.64", "10.0.0.1", "0.0.0.0"])
+    def test_valid_bridge_ip(self, bridge_ip):
+        """Test that dotted-quad IPv4 addresses are accepted."""
+        assert HueConfig(bridge_ip=bridge_ip).bridge_ip == bridge_ip
+    
+    @pytest.mark.parametrize(
+        "bridge_ip",
+        ["192.168.001.064", "256.1.1.1", "192.168.1", "bridge.local", "::1", ""],
+    )
+    def test_invalid_bridge_ip(self, bridge_ip):
+        """Test that leading zeros, out-of-range octets and non-IPv4 are rejected."""
+        with pytest.raises(ValidationError, match="Invalid IP address"):
+            HueConfig(bridge_ip=bridge_ip)
+    
+    def test_valid_username(self):
+        """Test that letters, digits and dashes are accepted."""
+        assert HueConfig(username="abc-DEF-123").username == "abc-DEF-123"
+    
+    @pytest.mark.parametrize(
+        "username", ["short", "has spaces in it", "under_score_name"]
+    )
+    def test_invalid_username(self, username):
+        """Test that short names and other characters are rejected."""
+        with pytest.raises(ValidationError, match="Username must be"):
+            HueConfig(username=username)
+    
+    def test_unknown_field_is_rejected(self):
+        """Test that extra="forbid" catches misspelled settings."""
+        with pytest.raises(ValidationError, match="Extra inputs are not permitted"):
+            HueConfig(bridge_ipp="192.168.1.64")
+    
+    def test_config_is_frozen(self):
+        """Test that settings can't change after creation."""
+        config = HueConfig()
+        with pytest.raises(ValidationError):
+            config.bridge_ip = "10.0.0.1"
+    
+    def test_base_url(self):
+        """Test that base_url combines the bridge IP and username, built once."""
+        config = HueConfig(bridge_ip="10.0.0.2", username="abcdefghij")
+        assert config.base_url == "http://10.0.0.2/api/abcdefghij"
+        assert config.base_url is config.base_url
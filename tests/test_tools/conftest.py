@@ -0,0 +1,55 @@
+"""Shared fixtures for the MCP tool tests."""
+
+from contextlib import ExitStack
+from unittest.mock import Mock, patch
+
+import pytest
+
+from hue_mcp.light_manager import LightManager
+
+
+@pytest.fixture(scope="session")
+def light_control():
+    """The light tool module, imported only once a test needs it.
+
+    Importing the tools registers them on the FastMCP instance, so deferring
+    it keeps collection (and ``-k`` runs that skip these tests) cheap.
+    """
+    from hue_mcp.tools import light_control
+
+    return light_control
+
+
+@pytest.fixture(scope="session")
+def room_control():
+    """The room tool module, imported only once a test needs it."""
+    from hue_mcp.tools import room_control
+
+    return room_control
+
+
+@pytest.fixture(scope="module")
+def patched_manager():
+    """Patch every tool module's manager lookup for one test module.
+
+    Module scope undoes the patch before the next test module runs, so tests
+    elsewhere always see the real get_manager.
+    """
+    from hue_mcp.tools import discovery, light_control, room_control
+
+    # spec'd plain Mock: async methods still come back as AsyncMocks, and
+    # misspelled attributes raise instead of silently auto-creating
+    manager = Mock(spec=LightManager)
+    with ExitStack() as stack:
+        for module in (discovery, light_control, room_control):
+            stack.enter_context(
+                patch.object(module, "get_manager", return_value=manager)
+            )
+        yield manager
+
+
+@pytest.fixture
+def mock_manager(patched_manager):
+    """Shared manager mock, with return values and side effects reset per test."""
+    yield patched_manager
+    patched_manager.reset_mock(return_value=True, side_effect=True)
@@ -1,315 +1,266 @@
 """Unit tests for light control MCP tools."""
 
-import pytest
-import pytest_asyncio
 import json
-from unittest.mock import AsyncMock, patch
 
-from hue_mcp.tools import light_control
-from hue_mcp.light_manager import HueResponse
+import pytest
+
 from hue_mcp.hue_client import HueError, HueValidationError
+from hue_mcp.light_manager import (
+    UNEXPECTED_ERROR_JSON,
+    HueResponse,
+    LightControlRequest,
+)
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    _loads = json.loads
+
+# The tests share no loop state, so one event loop serves the whole module;
+# the group keeps them on one xdist worker with the shared manager mock
+pytestmark = [
+    pytest.mark.asyncio(loop_scope="module"),
+    pytest.mark.xdist_group("light_control"),
+]
+
+# Canned manager responses; the tools only serialize them, never mutate
+_RESP_ON_1 = HueResponse(
+    success=True,
+    message="Light 1 on successfully",
+    lights_affected=[1],
+    data={"success": True},
+)
+_RESP_OFF_5 = HueResponse(
+    success=True,
+    message="Light 5 off successfully",
+    lights_affected=[5],
+    data={"success": True},
+)
+_RESP_TOGGLE_3 = HueResponse(
+    success=True,
+    message="Light 3 toggle successfully",
+    lights_affected=[3],
+    data={"success": True},
+)
+_RESP_STATE_1 = HueResponse(
+    success=True,
+    message="Retrieved status for light 1",
+    data={
+        "name": "Test Light",
+        "state": {"on": True, "bri": 200, "ct": 366},
+    },
+)
+
+# Error messages the tools pass through (or produce) verbatim
+_MSG_BRIDGE_FAILED = "Bridge connection failed"
+_MSG_LIGHT_NOT_FOUND = "Light not found"
+_MSG_UNEXPECTED = _loads(UNEXPECTED_ERROR_JSON)["message"]
+
+# Request the tool should hand the manager for "turn light 1 on"
+_REQ_ON_1 = LightControlRequest(light_id=1, action="on", brightness=200, color_temp=366)
+
+# The tools' JSON payloads for the canned success responses
+_EXPECTED_ON_1 = {
+    "success": True,
+    "message": "Light 1 on successfully",
+    "data": {"success": True},
+    "lights_affected": [1],
+}
+_EXPECTED_OFF_5 = {
+    "success": True,
+    "message": "Light 5 off successfully",
+    "data": {"success": True},
+    "lights_affected": [5],
+}
+_EXPECTED_TOGGLE_3 = {
+    "success": True,
+    "message": "Light 3 toggle successfully",
+    "data": {"success": True},
+    "lights_affected": [3],
+}
 
 
 class TestHueControlLight:
     """Test hue_control_light MCP tool."""
-    
-    async def test_valid_light_control_on(self):
+
+    async def test_valid_light_control_on(self, light_control, mock_manager):
         """Test controlling a light with valid parameters."""
-        with patch('hue_mcp.tools.light_control.LightManager') as mock_manager_class:
-            # Setup mock
-            mock_manager = AsyncMock()
-            mock_manager_class.return_value = mock_manager
-            
-            expected_response = HueResponse(
-                success=True,
-                message="Light 1 on successfully",
-                lights_affected=[1],
-                data={"success": True}
-            )
-            mock_manager.control_light.return_value = expected_response
-            
-            # Test - Call the underlying function from the FastMCP tool
-            result = await light_control.hue_control_light.fn(
-                light_id=1,
-                action="on",
-                brightness=200,
-                color_temp=366
-            )
-            
-            # Assertions
-            result_dict = json.loads(result)
-            assert result_dict["success"] is True
-            assert result_dict["message"] == "Light 1 on successfully"
-            assert result_dict["lights_affected"] == [1]
-            
-            # Verify manager was called correctly
-            mock_manager.control_light.assert_called_once()
-            call_args = mock_manager.control_light.call_args[0][0]
-            assert call_args.light_id == 1
-            assert call_args.action == "on"
-            assert call_args.brightness == 200
-            assert call_args.color_temp == 366
-    
-    async def test_valid_light_control_off(self):
-        """Test turning off a light."""
-        with patch('hue_mcp.tools.light_control.LightManager') as mock_manager_class:
-            # Setup mock
-            mock_manager = AsyncMock()
-            mock_manager_class.return_value = mock_manager
-            
-            expected_response = HueResponse(
-                success=True,
-                message="Light 5 off successfully",
-                lights_affected=[5],
-                data={"success": True}
-            )
-            mock_manager.control_light.return_value = expected_response
-            
-            # Test
-            result = await light_control.hue_control_light.fn(
-                light_id=5,
-                action="off"
-            )
-            
-            # Assertions
-            result_dict = json.loads(result)
-            assert result_dict["success"] is True
-            assert result_dict["message"] == "Light 5 off successfully"
-    
-    async def test_valid_light_control_toggle(self):
-        """Test toggling a light."""
-        with patch('hue_mcp.tools.light_control.LightManager') as mock_manager_class:
-            # Setup mock
-            mock_manager = AsyncMock()
-            mock_manager_class.return_value = mock_manager
-            
-            expected_response = HueResponse(
-                success=True,
-                message="Light 3 toggle successfully",
-                lights_affected=[3],
-                data={"success": True}
-            )
-            mock_manager.control_light.return_value = expected_response
-            
-            # Test
-            result = await light_control.hue_control_light.fn(
-                light_id=3,
-                action="toggle",
-                brightness=150
-            )
-            
-            # Assertions
-            result_dict = json.loads(result)
-            assert result_dict["success"] is True
-    
-    async def test_invalid_light_id_low(self):
-        """Test with light ID below valid range."""
-        result = await light_control.hue_control_light.fn(
-            light_id=0,
-            action="on"
-        )
-        
-        result_dict = json.loads(result)
-        assert result_dict["success"] is False
-        assert "validation_errors" in result_dict["data"]
-    
-    async def test_invalid_light_id_high(self):
-        """Test with light ID above valid range."""
-        result = await light_control.hue_control_light.fn(
-            light_id=18,
-            action="on"
-        )
-        
-        result_dict = json.loads(result)
-        assert result_dict["success"] is False
-        assert "validation_errors" in result_dict["data"]
-    
-    async def test_invalid_action(self):
-        """Test with invalid action parameter."""
+        # Setup mock
+        mock_manager.control_light.return_value = _RESP_ON_1
+
+        # Test - Call the underlying function from the FastMCP tool
         result = await light_control.hue_control_light.fn(
             light_id=1,
-            action="invalid_action"
+            action="on",
+            brightness=200,
+            color_temp=366,
         )
-        
-        result_dict = json.loads(result)
-        assert result_dict["success"] is False
-        assert result_dict["data"]["error_type"] == "HueValidationError"
-    
-    async def test_invalid_brightness_low(self):
-        """Test with brightness below valid range."""
+
+        # Assertions
+        assert _loads(result) == _EXPECTED_ON_1
+
+        # Verify manager was called correctly
+        mock_manager.control_light.assert_called_once_with(_REQ_ON_1)
+
+    async def test_valid_light_control_off(self, light_control, mock_manager):
+        """Test turning off a light."""
+        # Setup mock
+        mock_manager.control_light.return_value = _RESP_OFF_5
+
+        # Test
         result = await light_control.hue_control_light.fn(
-            light_id=1,
-            action="on",
-            brightness=0
+            light_id=5,
+            action="off",
         )
-        
-        result_dict = json.loads(result)
-        assert result_dict["success"] is False
-        assert "validation_errors" in result_dict["data"]
-    
-    async def test_invalid_brightness_high(self):
-        """Test with brightness above valid range."""
+
+        # Assertions
+        assert _loads(result) == _EXPECTED_OFF_5
+
+    async def test_valid_light_control_toggle(self, light_control, mock_manager):
+        """Test toggling a light."""
+        # Setup mock
+        mock_manager.control_light.return_value = _RESP_TOGGLE_3
+
+        # Test
         result = await light_control.hue_control_light.fn(
-            light_id=1,
-            action="on",
-            brightness=255
+            light_id=3,
+            action="toggle",
+            brightness=150,
         )
-        
-        result_dict = json.loads(result)
+
+        # Assertions
+        assert _loads(result) == _EXPECTED_TOGGLE_3
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"light_id": 0, "action": "on"},
+            {"light_id": 18, "action": "on"},
+            {"light_id": 1, "action": "invalid_action"},
+            {"light_id": 1, "action": "on", "brightness": 0},
+            {"light_id": 1, "action": "on", "brightness": 255},
+            {"light_id": 1, "action": "on", "color_temp": 150},
+            {"light_id": 1, "action": "on", "color_temp": 501},
+        ],
+        ids=[
+            "light_id_low",
+            "light_id_high",
+            "action",
+            "brightness_low",
+            "brightness_high",
+            "color_temp_low",
+            "color_temp_high",
+        ],
+    )
+    async def test_invalid_parameters(self, light_control, params):
+        """Test that out-of-range or unknown parameters are rejected."""
+        result = await light_control.hue_control_light.fn(**params)
+
+        result_dict = _loads(result)
         assert result_dict["success"] is False
         assert "validation_errors" in result_dict["data"]
-    
-    async def test_invalid_color_temp_low(self):
-        """Test with color temperature below valid range."""
+
+    async def test_hue_error_handling(self, light_control, mock_manager):
+        """Test handling of HueError from manager."""
+        # Setup mock to raise HueError
+        mock_manager.control_light.side_effect = HueError(_MSG_BRIDGE_FAILED)
+
+        # Test
         result = await light_control.hue_control_light.fn(
             light_id=1,
             action="on",
-            color_temp=150
         )
-        
-        result_dict = json.loads(result)
+
+        # Assertions
+        result_dict = _loads(result)
         assert result_dict["success"] is False
-        assert "validation_errors" in result_dict["data"]
-    
-    async def test_invalid_color_temp_high(self):
-        """Test with color temperature above valid range."""
+        assert result_dict["message"] == _MSG_BRIDGE_FAILED
+        assert result_dict["data"]["error_type"] == "HueError"
+
+    async def test_unexpected_error_handling(self, light_control, mock_manager):
+        """Test handling of unexpected errors."""
+        # Setup mock to raise unexpected error
+        mock_manager.control_light.side_effect = RuntimeError("Unexpected error")
+
+        # Test
         result = await light_control.hue_control_light.fn(
             light_id=1,
             action="on",
-            color_temp=501
         )
-        
-        result_dict = json.loads(result)
+
+        # Assertions
+        result_dict = _loads(result)
         assert result_dict["success"] is False
-        assert "validation_errors" in result_dict["data"]
-    
-    async def test_hue_error_handling(self):
-        """Test handling of HueError from manager."""
-        with patch('hue_mcp.tools.light_control.LightManager') as mock_manager_class:
-            # Setup mock to raise HueError
-            mock_manager = AsyncMock()
-            mock_manager_class.return_value = mock_manager
-            mock_manager.control_light.side_effect = HueError("Bridge connection failed")
-            
-            # Test
-            result = await light_control.hue_control_light.fn(
-                light_id=1,
-                action="on"
-            )
-            
-            # Assertions
-            result_dict = json.loads(result)
-            assert result_dict["success"] is False
-            assert "Bridge connection failed" in result_dict["message"]
-            assert result_dict["data"]["error_type"] == "HueError"
-    
-    async def test_unexpected_error_handling(self):
-        """Test handling of unexpected errors."""
-        with patch('hue_mcp.tools.light_control.LightManager') as mock_manager_class:
-            # Setup mock to raise unexpected error
-            mock_manager = AsyncMock()
-            mock_manager_class.return_value = mock_manager
-            mock_manager.control_light.side_effect = RuntimeError("Unexpected error")
-            
-            # Test
-            result = await light_control.hue_control_light.fn(
-                light_id=1,
-                action="on"
-            )
-            
-            # Assertions
-            result_dict = json.loads(result)
-            assert result_dict["success"] is False
-            assert "An unexpected error occurred" in result_dict["message"]
-            assert result_dict["data"]["error_type"] == "UnexpectedError"
+        assert result_dict["message"] == _MSG_UNEXPECTED
+        assert result_dict["data"]["error_type"] == "UnexpectedError"
 
 
 class TestHueGetLightState:
     """Test hue_get_light_state MCP tool."""
-    
-    async def test_valid_light_state_query(self):
+
+    async def test_valid_light_state_query(self, light_control, mock_manager):
         """Test getting light state with valid light ID."""
-        with patch('hue_mcp.tools.light_control.LightManager') as mock_manager_class:
-            # Setup mock
-            mock_manager = AsyncMock()
-            mock_manager_class.return_value = mock_manager
-            
-            expected_response = HueResponse(
-                success=True,
-                message="Retrieved status for light 1",
-                data={
-                    "name": "Test Light",
-                    "state": {"on": True, "bri": 200, "ct": 366}
-                }
-            )
-            mock_manager.get_light_status.return_value = expected_response
-            
-            # Test
-            result = await light_control.hue_get_light_state.fn(light_id=1)
-            
-            # Assertions
-            result_dict = json.loads(result)
-            assert result_dict["success"] is True
-            assert result_dict["message"] == "Retrieved status for light 1"
-            assert "Test Light" in str(result_dict["data"])
-            
-            # Verify manager was called correctly
-            mock_manager.get_light_status.assert_called_once_with(1)
-    
-    async def test_invalid_light_id_type(self):
+        # Setup mock
+        mock_manager.get_light_status.return_value = _RESP_STATE_1
+
+        # Test
+        result = await light_control.hue_get_light_state.fn(light_id=1)
+
+        # Assertions
+        result_dict = _loads(result)
+        assert result_dict["success"] is True
+        assert result_dict["message"] == "Retrieved status for light 1"
+        assert result_dict["data"]["name"] == "Test Light"
+
+        # Verify manager was called correctly
+        mock_manager.get_light_status.assert_called_once_with(1)
+
+    async def test_invalid_light_id_type(self, light_control):
         """Test with non-integer light ID."""
         result = await light_control.hue_get_light_state.fn(light_id="invalid")
-        
-        result_dict = json.loads(result)
-        assert result_dict["success"] is False
-        assert "ValidationError" in result_dict["data"]["error_type"]
-    
-    async def test_invalid_light_id_low(self):
-        """Test with light ID below valid range."""
-        result = await light_control.hue_get_light_state.fn(light_id=0)
-        
-        result_dict = json.loads(result)
+
+        result_dict = _loads(result)
         assert result_dict["success"] is False
-        assert "must be an integer between 1 and 17" in result_dict["message"]
-    
-    async def test_invalid_light_id_high(self):
-        """Test with light ID above valid range."""
-        result = await light_control.hue_get_light_state.fn(light_id=18)
-        
-        result_dict = json.loads(result)
+        assert result_dict["data"]["error_type"] == "ValidationError"
+
+    @pytest.mark.parametrize("light_id", [0, 18, 5.0], ids=["low", "high", "float"])
+    async def test_invalid_light_id_value(self, light_control, mock_manager, light_id):
+        """Test with a light ID outside the valid range or not an integer."""
+        result = await light_control.hue_get_light_state.fn(light_id=light_id)
+
+        result_dict = _loads(result)
         assert result_dict["success"] is False
-        assert "must be an integer between 1 and 17" in result_dict["message"]
-    
-    async def test_hue_error_handling(self):
+        expected = light_control._LIGHT_ID_RANGE_MESSAGE.format(light_id)
+        assert result_dict["message"] == expected
+        mock_manager.get_light_status.assert_not_called()
+
+    async def test_hue_error_handling(self, light_control, mock_manager):
         """Test handling of HueError from manager."""
-        with patch('hue_mcp.tools.light_control.LightManager') as mock_manager_class:
-            # Setup mock to raise HueError
-            mock_manager = AsyncMock()
-            mock_manager_class.return_value = mock_manager
-            mock_manager.get_light_status.side_effect = HueValidationError("Light not found")
-            
-            # Test
-            result = await light_control.hue_get_light_state.fn(light_id=1)
-            
-            # Assertions
-            result_dict = json.loads(result)
-            assert result_dict["success"] is False
-            assert "Light not found" in result_dict["message"]
-            assert result_dict["data"]["error_type"] == "HueValidationError"
-    
-    async def test_unexpected_error_handling(self):
+        # Setup mock to raise HueError
+        mock_manager.get_light_status.side_effect = HueValidationError(
+            _MSG_LIGHT_NOT_FOUND
+        )
+
+        # Test
+        result = await light_control.hue_get_light_state.fn(light_id=1)
+
+        # Assertions
+        result_dict = _loads(result)
+        assert result_dict["success"] is False
+        assert result_dict["message"] == _MSG_LIGHT_NOT_FOUND
+        assert result_dict["data"]["error_type"] == "HueValidationError"
+
+    async def test_unexpected_error_handling(self, light_control, mock_manager):
         """Test handling of unexpected errors."""
-        with patch('hue_mcp.tools.light_control.LightManager') as mock_manager_class:
-            # Setup mock to raise unexpected error
-            mock_manager = AsyncMock()
-            mock_manager_class.return_value = mock_manager
-            mock_manager.get_light_status.side_effect = RuntimeError("Unexpected error")
-            
-            # Test
-            result = await light_control.hue_get_light_state.fn(light_id=1)
-            
-            # Assertions
-            result_dict = json.loads(result)
-            assert result_dict["success"] is False
-            assert "An unexpected error occurred" in result_dict["message"]
-            assert result_dict["data"]["error_type"] == "UnexpectedError"
\ No newline at end of file
+        # Setup mock to raise unexpected error
+        mock_manager.get_light_status.side_effect = RuntimeError("Unexpected error")
+
+        # Test
+        result = await light_control.hue_get_light_state.fn(light_id=1)
+
+        # Assertions
+        result_dict = _loads(result)
+        assert result_dict["success"] is False
+        assert result_dict["message"] == _MSG_UNEXPECTED
+        assert result_dict["data"]["error_type"] == "UnexpectedError"
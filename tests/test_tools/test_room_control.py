@@ -0,0 +1,137 @@
+"""Unit tests for room control MCP tools."""
+
+import json
+
+import pytest
+
+from hue_mcp.hue_client import HueConnectionError
+from hue_mcp.light_manager import (
+    UNEXPECTED_ERROR_JSON,
+    HueResponse,
+    RoomControlRequest,
+)
+
+
+class TestHueControlRoom:
+    """Test hue_control_room MCP tool."""
+
+    async def test_valid_room_control(self, room_control, mock_manager):
+        """Test controlling a room with valid parameters."""
+        # Setup mock
+        mock_manager.control_room.return_value = HueResponse(
+            success=True,
+            message="Controlled 4/4 lights in kitchen",
+            lights_affected=[10, 12, 13, 17],
+            data={
+                "successful_operations": 4,
+                "failed_operations": 0,
+                "failed_light_ids": [],
+            },
+        )
+
+        # Test
+        result = await room_control.hue_control_room.fn(
+            room="kitchen",
+            action="on",
+            brightness=150,
+        )
+
+        # Assertions
+        assert json.loads(result) == {
+            "success": True,
+            "message": "Controlled 4/4 lights in kitchen",
+            "data": {
+                "successful_operations": 4,
+                "failed_operations": 0,
+                "failed_light_ids": [],
+            },
+            "lights_affected": [10, 12, 13, 17],
+        }
+        mock_manager.control_room.assert_called_once_with(
+            RoomControlRequest(room="kitchen", action="on", brightness=150)
+        )
+
+    async def test_unknown_room_is_reported(self, room_control, mock_manager):
+        """Test that the manager's unknown-room response is passed through."""
+        # Setup mock
+        mock_manager.control_room.return_value = HueResponse(
+            success=False,
+            message="Unknown room 'garage'",
+            data={"error_type": "HueValidationError"},
+        )
+
+        # Test
+        result = await room_control.hue_control_room.fn(room="garage", action="on")
+
+        # Assertions
+        assert json.loads(result) == {
+            "success": False,
+            "message": "Unknown room 'garage'",
+            "data": {"error_type": "HueValidationError"},
+        }
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"room": "kitchen", "action": "dim"},
+            {"room": "kitchen", "action": "on", "brightness": 0},
+            {"room": "kitchen", "action": "on", "color_temp": 501},
+            {"room": "kitchen", "action": "on", "red": 256},
+            {"room": "kitchen", "action": "on", "saturation": 255},
+        ],
+        ids=["action", "brightness", "color_temp", "red", "saturation"],
+    )
+    async def test_invalid_parameters(self, room_control, mock_manager, params):
+        """Test that invalid parameters report pydantic's validation errors."""
+        result = await room_control.hue_control_room.fn(**params)
+
+        result_dict = json.loads(result)
+        assert result_dict["success"] is False
+        assert result_dict["message"].startswith("Invalid parameters: ")
+        assert "validation_errors" in result_dict["data"]
+        mock_manager.control_room.assert_not_called()
+
+    async def test_value_error_handling(self, room_control, mock_manager):
+        """Test that a plain ValueError is reported as a validation error."""
+        # Setup mock to raise ValueError
+        mock_manager.control_room.side_effect = ValueError("Room list is empty")
+
+        # Test
+        result = await room_control.hue_control_room.fn(room="kitchen", action="on")
+
+        # Assertions
+        assert json.loads(result) == {
+            "success": False,
+            "message": "Room list is empty",
+            "data": {"error_type": "ValidationError"},
+        }
+
+    async def test_hue_error_handling(self, room_control, mock_manager):
+        """Test handling of HueError from manager."""
+        # Setup mock to raise HueError
+        mock_manager.control_room.side_effect = HueConnectionError("Bridge unreachable")
+
+        # Test
+        result = await room_control.hue_control_room.fn(room="kitchen", action="off")
+
+        # Assertions
+        assert json.loads(result) == {
+            "success": False,
+            "message": "Bridge unreachable",
+            "data": {"error_type": "HueConnectionError"},
+        }
+
+    async def test_unexpected_error_handling(self, room_control, mock_manager, caplog):
+        """Test that unexpected errors get the static reply and a logged traceback."""
+        # Setup mock to raise unexpected error
+        mock_manager.control_room.side_effect = RuntimeError("Unexpected error")
+
+        # Test
+        result = await room_control.hue_control_room.fn(room="kitchen", action="on")
+
+        # Assertions
+        assert result == UNEXPECTED_ERROR_JSON
+        record = caplog.records[-1]
+        assert record.name == "hue_mcp.tools.room_control"
+        assert record.getMessage() == "Unexpected error in hue_control_room"
+        assert record.exc_info is not None